@@ -0,0 +1,156 @@
+"""Guard the command line startup time against import time regressions.
+Besides the help, real commands are run on a sample media directory, which
+must not import heavy modules, as they neither read metadata nor search for
+locations.
+
+Run from the repository root:
+    python benchmarks/startup.py [--runs 20] [--max-milliseconds 150]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# The repository root, where main.py lives.
+ROOT_DIRECTORY: Path = Path(__file__).resolve().parent.parent
+
+# The modules that must only be imported when their feature is used.
+HEAVY_MODULES: set = {
+    "exifread",
+    "geopy",
+    "pytz",
+    "timezonefinder",
+    "unidecode",
+}
+
+
+# The sample media directory layout, with the number of videos per folder.
+SAMPLE_DIRECTORIES: dict[str, int] = {"2023/summer": 20, "2023/winter": 20}
+
+
+def create_sample_directory(directory_path: Path) -> None:
+    """Create a sample media directory, with videos named after the datetime
+    they were taken, so that organizing them does not read their metadata.
+
+    Args:
+        directory_path (Path): The sample directory path.
+    """
+    for sample_directory, video_count in SAMPLE_DIRECTORIES.items():
+        (directory_path / sample_directory).mkdir(parents=True)
+        for index in range(video_count):
+            (
+                directory_path
+                / sample_directory
+                / f"VID_20230714_18{index:02d}22.mp4"
+            ).touch()
+
+
+def get_eagerly_imported_modules(arguments: list[str] | None) -> list[str]:
+    """Get the heavy modules imported by loading main.py, and running the
+    command given by the arguments, if any.
+
+    Args:
+        arguments (list[str] | None): The command line arguments.
+
+    Returns:
+        list[str]: The heavy modules imported.
+    """
+    output: str = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            (
+                "import sys, main\n"
+                "if len(sys.argv) > 1:\n"
+                "    main.main(sys.argv[1:])\n"
+                "print('\\n'.join(sys.modules), file=sys.stderr)"
+            ),
+            *(arguments or []),
+        ],
+        cwd=ROOT_DIRECTORY,
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stderr
+    return sorted(
+        {module.split(".")[0] for module in output.split()} & HEAVY_MODULES
+    )
+
+
+def measure_startup(arguments: list[str], runs: int) -> float:
+    """Measure the median time it takes to run the command.
+
+    Args:
+        arguments (list[str]): The command line arguments.
+        runs (int): The number of runs.
+
+    Returns:
+        float: The median run time, in milliseconds.
+    """
+    durations: list[float] = []
+    for _ in range(runs):
+        start: float = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "main.py", *arguments],
+            cwd=ROOT_DIRECTORY,
+            capture_output=True,
+            check=True,
+        )
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--max-milliseconds", type=float, default=150.0)
+    arguments: argparse.Namespace = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as sample_directory:
+        create_sample_directory(directory_path=Path(sample_directory))
+
+        # The commands to check and measure. Organizing goes last, as it
+        # renames the sample media files.
+        commands: dict[str, list[str] | None] = {
+            "import": None,
+            "stats": ["stats", sample_directory, "--location-searching"],
+            "organize": ["organize", sample_directory],
+        }
+
+        # Fail if any heavy module is imported eagerly.
+        for name, command_arguments in commands.items():
+            eagerly_imported_modules: list[str] = get_eagerly_imported_modules(
+                arguments=command_arguments
+            )
+            if eagerly_imported_modules:
+                print(
+                    f"Imported by {name}:"
+                    f" {', '.join(eagerly_imported_modules)}"
+                )
+                return 1
+
+        # Fail if the help or the statistics are slower than allowed.
+        slow: bool = False
+        for name, command_arguments in {
+            "startup": ["--help"],
+            "statistics": ["stats", sample_directory],
+        }.items():
+            median: float = measure_startup(
+                arguments=command_arguments, runs=arguments.runs
+            )
+            print(f"Median {name} time: {median:.1f} ms")
+            if median > arguments.max_milliseconds:
+                print(
+                    f"Slower than the allowed {arguments.max_milliseconds:.1f}"
+                    " ms"
+                )
+                slow = True
+    return 1 if slow else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,10 @@
+from enum import Enum
+
+
+class FilenameDatetimePolicy(Enum):
+    # Never use the datetime found in the filename.
+    NEVER = "NEVER"
+    # Use it only when the metadata does not contain the datetime taken.
+    FALLBACK = "FALLBACK"
+    # Use it instead of the metadata, without reading it if not needed.
+    PREFER = "PREFER"
@@ -10,7 +10,7 @@ def get_oldest_datetime(media_path: str) -> datetime:
         media_path (str): The path to the media file.
 
     Returns:
-        datetime: The oldest datetime possible.
+        datetime: The oldest datetime possible, in the local time zone.
     """
 
     # Get creation time if available, according to the OS.
@@ -28,4 +28,4 @@ def get_oldest_datetime(media_path: str) -> datetime:
     # Find the oldest time among the three.
     return datetime.datetime.fromtimestamp(
         min(creation_time, modification_time, access_time)
-    )
+    ).astimezone()
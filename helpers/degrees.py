@@ -1,5 +1,11 @@
-from exifread.classes import IfdTag
-from exifread.utils import Ratio
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+# Only needed for type checking, to avoid importing exifread on startup.
+if TYPE_CHECKING:
+    from exifread.classes import IfdTag
+    from exifread.utils import Ratio
 
 
 def convert_metadata_location_to_degrees(metadata_location: IfdTag) -> float:
@@ -1,12 +1,34 @@
+import argparse
+import sys
+from dataclasses import fields
 from pathlib import Path
 
-import pytz
-
+from enumerations.filename_datetime_policy import FilenameDatetimePolicy
 from helpers.strings import to_boolean
+from utilities.configuration import (
+    OrganizerConfiguration,
+    load_configuration_file,
+)
 from utilities.organize import rename_and_organize_media_files
+from utilities.organizer import Organizer
+
+
+def is_valid_time_zone(time_zone: str) -> bool:
+    """Check if the time zone is valid.
+
+    Args:
+        time_zone (str): The time zone name, e.g. Europe/Athens.
 
+    Returns:
+        bool: True if the time zone is valid.
+    """
+    # Imported only when needed, to speed up the startup.
+    import pytz
 
-def main() -> None:
+    return time_zone in pytz.all_timezones
+
+
+def interactive() -> None:
     print("Welcome to the Media File Organizer!")
     directory_path: str = input(
         "Please enter the path to the directory containing your media files: "
@@ -32,8 +54,17 @@ def main() -> None:
         or "N"
     )
 
+    # Default to "n" if nothing is entered.
+    time_zone_searching: str = (
+        input(
+            "Would you like to use the time zone each media file was taken at,"
+            " when found? (y/N): "
+        ).strip()
+        or "N"
+    )
+
     # Check if time zone is valid.
-    if time_zone and time_zone not in pytz.all_timezones:
+    if time_zone and not is_valid_time_zone(time_zone=time_zone):
         print("Invalid time zone entered! Exiting...")
         return
 
@@ -49,15 +80,273 @@ def main() -> None:
         )
         return
 
+    if time_zone_searching.lower() not in ["y", "n"]:
+        print(
+            "Invalid input for time zone searching! Please enter 'y' or 'n'."
+            " Exiting..."
+        )
+        return
+
     # Start processing the files
     rename_and_organize_media_files(
         directory_path=directory_path,
         location_searching=to_boolean(location_searching),
         naming_datetime_format=naming_datetime_format,
         time_zone=time_zone,
+        time_zone_searching=to_boolean(time_zone_searching),
     )
     print("Processing complete!")
 
 
+def create_argument_parser() -> argparse.ArgumentParser:
+    """Create the command line arguments parser.
+
+    Returns:
+        argparse.ArgumentParser: The arguments parser.
+    """
+
+    # The arguments shared by all commands.
+    # Options left unset fall back to the configuration file, if any.
+    common_parser = argparse.ArgumentParser(add_help=False)
+    common_parser.add_argument(
+        "paths",
+        nargs="+",
+        type=Path,
+        help="the directories or media files to process",
+    )
+    common_parser.add_argument(
+        "--config",
+        type=Path,
+        help="a TOML file with the configuration options",
+    )
+    common_parser.add_argument(
+        "--location-searching",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="organize the media files in folders by location",
+    )
+    common_parser.add_argument(
+        "--deferred-location-searching",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="only rename the media files, and queue them to be moved to"
+        " their location folders by the relocate command",
+    )
+    common_parser.add_argument(
+        "--time-zone",
+        default=None,
+        help="the time zone to use for converting, e.g. Europe/Athens",
+    )
+    common_parser.add_argument(
+        "--time-zone-searching",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="use the time zone each media file was taken at, when found",
+    )
+    common_parser.add_argument(
+        "--filename-datetime-policy",
+        choices=[policy.value for policy in FilenameDatetimePolicy],
+        type=str.upper,
+        default=None,
+        help="when to use the datetime found in filenames like"
+        " IMG_20230714_183022.jpg: never, as a fallback when the metadata"
+        " does not contain it (default), or preferably, skipping the"
+        " metadata when it is not needed otherwise",
+    )
+    common_parser.add_argument(
+        "--metadata-deadline",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="retry the media files whose metadata take longer to read,"
+        " after all the others",
+    )
+    common_parser.add_argument(
+        "--geocoding-deadline",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="retry the media files whose location takes longer to find,"
+        " after all the others",
+    )
+    common_parser.add_argument(
+        "--base-directory",
+        type=Path,
+        default=None,
+        help="the directory to organize the media files given on their own"
+        " under, keeping its location folders and state there, instead of"
+        " their parent folder",
+    )
+    common_parser.add_argument(
+        "--naming-datetime-format",
+        default=None,
+        help="the naming datetime format, e.g. %%Y-%%m-%%d %%H:%%M:%%S",
+    )
+
+    # The commands.
+    parser = argparse.ArgumentParser(
+        description="Rename and organize your media, using their metadata."
+        " Run without arguments for the interactive mode."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser(
+        "organize",
+        parents=[common_parser],
+        help="rename and organize the media files",
+    )
+    subparsers.add_parser(
+        "plan",
+        parents=[common_parser],
+        help="show how the media files would be renamed and organized",
+    )
+    subparsers.add_parser(
+        "relocate",
+        parents=[common_parser],
+        help="move the media files queued by deferred location searching"
+        " to their location folders",
+    )
+    undo_parser = subparsers.add_parser(
+        "undo",
+        help="move the media files back to where they were before a run",
+    )
+    undo_parser.add_argument("run", help="the identifier of the run to undo")
+    undo_parser.add_argument(
+        "paths",
+        nargs="+",
+        type=Path,
+        help="the directories the run organized",
+    )
+    history_parser = subparsers.add_parser(
+        "history", help="list the runs that can be undone"
+    )
+    history_parser.add_argument(
+        "paths",
+        nargs="+",
+        type=Path,
+        help="the organized directories",
+    )
+    subparsers.add_parser(
+        "stats",
+        parents=[common_parser],
+        help="count the media files and the directories changed since the"
+        " previous run",
+    )
+    return parser
+
+
+def main(arguments: list[str] | None = None) -> int:
+    """Run the command given by the arguments, or the interactive mode
+    if there are none.
+
+    Args:
+        arguments (list[str] | None, optional):
+            The command line arguments. Defaults to the ones of the process.
+
+    Returns:
+        int: The exit code.
+    """
+
+    # Run the interactive mode if there are no arguments.
+    arguments = sys.argv[1:] if arguments is None else arguments
+    if not arguments:
+        interactive()
+        return 0
+
+    parsed_arguments: argparse.Namespace = create_argument_parser().parse_args(
+        arguments
+    )
+
+    # Load the configuration file, overridden by the given options.
+    configuration_path: Path | None = getattr(parsed_arguments, "config", None)
+    try:
+        options: dict = (
+            load_configuration_file(configuration_path=configuration_path)
+            if configuration_path
+            else {}
+        )
+    except (OSError, ValueError) as exception:
+        print(f"Invalid configuration file: {exception}", file=sys.stderr)
+        return 2
+    for field in fields(OrganizerConfiguration):
+        value = getattr(parsed_arguments, field.name, None)
+        if value is not None:
+            options[field.name] = value
+    if options.get("base_directory"):
+        options["base_directory"] = Path(options["base_directory"]).resolve()
+    try:
+        configuration: OrganizerConfiguration = OrganizerConfiguration(
+            **options
+        )
+    except ValueError as exception:
+        print(f"Invalid configuration: {exception}", file=sys.stderr)
+        return 2
+
+    # Check if time zone is valid.
+    if configuration.time_zone and not is_valid_time_zone(
+        time_zone=configuration.time_zone
+    ):
+        print("Invalid time zone entered!", file=sys.stderr)
+        return 2
+
+    # Check if the base directory exists.
+    if (
+        configuration.base_directory
+        and not configuration.base_directory.is_dir()
+    ):
+        print(
+            f"Invalid base directory entered: {configuration.base_directory}",
+            file=sys.stderr,
+        )
+        return 2
+
+    # Check if the paths exist, and resolve them, so that the recorded paths
+    # do not depend on the working directory.
+    for path in parsed_arguments.paths:
+        if not path.exists():
+            print(f"Invalid path entered: {path}", file=sys.stderr)
+            return 2
+    paths: list[Path] = [path.resolve() for path in parsed_arguments.paths]
+
+    # Run the command.
+    with Organizer(configuration=configuration) as organizer:
+        if parsed_arguments.command == "organize":
+            moves = organizer.organize(paths=paths)
+            print(
+                f"Processing complete! Moved {len(moves)} media files, in run"
+                f" {organizer.run_id}."
+            )
+        elif parsed_arguments.command == "plan":
+            for media_path, new_media_path in organizer.plan(paths=paths):
+                print(f"{media_path} -> {new_media_path}")
+        elif parsed_arguments.command == "relocate":
+            moves = organizer.relocate(paths=paths)
+            print(
+                f"Relocating complete! Moved {len(moves)} media files, in run"
+                f" {organizer.run_id}."
+            )
+        elif parsed_arguments.command == "undo":
+            moves = organizer.undo(paths=paths, run_id=parsed_arguments.run)
+            print(
+                f"Undoing complete! Moved {len(moves)} media files, in run"
+                f" {organizer.run_id}."
+            )
+
+            # Fail if some moves could not be undone, and were kept.
+            if parsed_arguments.run in dict(organizer.runs(paths=paths)):
+                print(
+                    f"Some moves of run {parsed_arguments.run} could not be"
+                    " undone, and were kept to be retried.",
+                    file=sys.stderr,
+                )
+                return 1
+        elif parsed_arguments.command == "history":
+            for run_id, count in organizer.runs(paths=paths):
+                print(f"{run_id}: {count} moves")
+        elif parsed_arguments.command == "stats":
+            for name, count in organizer.stats(paths=paths).items():
+                print(f"{name}: {count}")
+    return 0
+
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
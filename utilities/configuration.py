@@ -0,0 +1,146 @@
+import json
+import re
+import tomllib
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+
+from enumerations.filename_datetime_policy import FilenameDatetimePolicy
+from utilities.media.filename import (
+    DEFAULT_FILENAME_DATETIME_PATTERNS,
+    compile_filename_datetime_patterns,
+)
+
+
+@dataclass(frozen=True)
+class OrganizerConfiguration:
+    """The configuration of the media files organizer.
+
+    Attributes:
+        location_searching (bool):
+            If True, the location will be used for organizing the media files.
+            Defaults to False.
+        naming_datetime_format (str | None):
+            The format to use for converting. Defaults to None.
+        time_zone (str | None):
+            The time zone to use for converting. Defaults to None.
+        time_zone_searching (bool):
+            If True, the time zone the media file was taken at will be used
+            for converting, when found. Defaults to False.
+        deferred_location_searching (bool):
+            If True, along with location searching, the media files are only
+            renamed and queued, to be moved to their location directories
+            when relocating. Defaults to False.
+        filename_datetime_policy (FilenameDatetimePolicy):
+            When to use the datetime taken found in the filename.
+            Defaults to FilenameDatetimePolicy.FALLBACK.
+        filename_datetime_patterns (tuple[str, ...]):
+            The filename patterns containing the datetime taken, with year,
+            month, day and optionally hour, minute and second named groups,
+            along with an empty utc one for filenames in UTC.
+            Defaults to DEFAULT_FILENAME_DATETIME_PATTERNS.
+        metadata_deadline (float | None):
+            The seconds to wait for the metadata of a media file, before
+            retrying it after all the others. Defaults to None, for no limit.
+        geocoding_deadline (float | None):
+            The seconds to wait for the location of a media file, before
+            retrying it after all the others. Defaults to None, for no limit.
+        base_directory (Path | None):
+            The directory that the media files given on their own are
+            organized under, keeping its location directories and state
+            there, e.g. the library an ingest service adds media files to.
+            Defaults to None, for the parent directory of each media file.
+    """
+
+    location_searching: bool = False
+    naming_datetime_format: str | None = None
+    time_zone: str | None = None
+    time_zone_searching: bool = False
+    deferred_location_searching: bool = False
+    filename_datetime_policy: FilenameDatetimePolicy = (
+        FilenameDatetimePolicy.FALLBACK
+    )
+    filename_datetime_patterns: tuple[str, ...] = (
+        DEFAULT_FILENAME_DATETIME_PATTERNS
+    )
+    metadata_deadline: float | None = None
+    geocoding_deadline: float | None = None
+    base_directory: Path | None = None
+
+    def __post_init__(self) -> None:
+        # Convert the options, as parsed from configuration files.
+        if not isinstance(
+            self.filename_datetime_policy, FilenameDatetimePolicy
+        ):
+            object.__setattr__(
+                self,
+                "filename_datetime_policy",
+                FilenameDatetimePolicy(
+                    str(self.filename_datetime_policy).upper()
+                ),
+            )
+        object.__setattr__(
+            self,
+            "filename_datetime_patterns",
+            tuple(self.filename_datetime_patterns),
+        )
+        if self.base_directory is not None:
+            object.__setattr__(
+                self, "base_directory", Path(self.base_directory)
+            )
+
+        # Compile the filename patterns, to reject the invalid ones early.
+        try:
+            compile_filename_datetime_patterns(
+                patterns=self.filename_datetime_patterns
+            )
+        except (re.error, TypeError) as exception:
+            raise ValueError(
+                f"Invalid filename datetime pattern: {exception}"
+            ) from exception
+
+    def serialize(self) -> str:
+        """Serialize the configuration, to compare it between runs.
+        The deadlines and the base directory are left out, as they do not
+        affect how directories are organized.
+
+        Returns:
+            str: The serialized configuration.
+        """
+        options: dict = asdict(self)
+        del options["metadata_deadline"], options["geocoding_deadline"]
+        del options["base_directory"]
+        return json.dumps(
+            options, default=lambda value: value.value, sort_keys=True
+        )
+
+
+def load_configuration_file(configuration_path: Path) -> dict:
+    """Load the organizer configuration options from a TOML file.
+
+    Args:
+        configuration_path (Path): The path to the configuration file.
+
+    Raises:
+        ValueError: If the file contains unknown options.
+
+    Returns:
+        dict: The configuration options found in the file.
+    """
+
+    # Parse the configuration file.
+    with configuration_path.open("rb") as configuration_file:
+        options: dict = tomllib.load(configuration_file)
+
+    # Check that all the options are known.
+    known_options: set = {
+        field.name for field in fields(OrganizerConfiguration)
+    }
+    unknown_options: set = set(options) - known_options
+    if unknown_options:
+        raise ValueError(
+            "Unknown configuration options:"
+            f" {', '.join(sorted(unknown_options))}"
+        )
+
+    # Finally, return the options.
+    return options
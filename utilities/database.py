@@ -0,0 +1,78 @@
+import sqlite3
+from pathlib import Path
+
+# The directory, inside the organized directory, that keeps the state
+# between the runs. It is never organized itself.
+STATE_DIRECTORY_NAME: str = ".media_organizer"
+
+# The database file, inside the state directory.
+DATABASE_FILE_NAME: str = "state.sqlite3"
+
+# The statements creating the database tables, if they do not exist.
+SCHEMA: list[str] = [
+    """
+    CREATE TABLE IF NOT EXISTS directory_summaries (
+        directory_path TEXT PRIMARY KEY,
+        configuration TEXT NOT NULL,
+        entry_count INTEGER NOT NULL,
+        max_modification_time INTEGER NOT NULL,
+        names_digest TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS geocode_queue (
+        media_path TEXT PRIMARY KEY,
+        latitude REAL NOT NULL,
+        longitude REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS move_history (
+        run_id TEXT NOT NULL,
+        sequence INTEGER NOT NULL,
+        media_path TEXT NOT NULL,
+        new_media_path TEXT NOT NULL,
+        PRIMARY KEY (run_id, sequence)
+    )
+    """,
+]
+
+
+def get_database_path(directory_path: Path) -> Path:
+    """Get the state database path of the organized directory.
+
+    Args:
+        directory_path (Path): The organized directory path.
+
+    Returns:
+        Path: The database path, which may not exist yet.
+    """
+    return directory_path / STATE_DIRECTORY_NAME / DATABASE_FILE_NAME
+
+
+def connect_database(directory_path: Path) -> sqlite3.Connection:
+    """Connect to the state database of the organized directory.
+    The state directory, the database and its tables are created if needed.
+
+    Args:
+        directory_path (Path): The organized directory path.
+
+    Returns:
+        sqlite3.Connection: The database connection.
+    """
+
+    # Create the state directory if it does not exist.
+    database_path: Path = get_database_path(directory_path=directory_path)
+    database_path.parent.mkdir(exist_ok=True)
+
+    # Connect to the database, writing ahead to a log, so that committing
+    # each move as soon as it is made stays cheap, and create the tables.
+    connection: sqlite3.Connection = sqlite3.connect(database_path)
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA synchronous = NORMAL")
+    for statement in SCHEMA:
+        connection.execute(statement)
+    connection.commit()
+
+    # Finally, return the connection.
+    return connection
@@ -0,0 +1,120 @@
+import queue
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage does not finish before its deadline.
+
+    Attributes:
+        stage (str): The stage name, e.g. metadata or geocoding.
+        future (Future): The future of the stage, which is still running.
+    """
+
+    def __init__(self, stage: str, future: Future) -> None:
+        super().__init__(f"The {stage} deadline was exceeded")
+        self.stage: str = stage
+        self.future: Future = future
+
+
+class StageWorkers:
+    """Run the functions of a stage in a fixed number of daemon threads.
+    Hung calls neither block the process from exiting, nor pile up while new
+    calls keep starting, as the calls beyond the number of threads wait for
+    one of them to be free.
+
+    Attributes:
+        stage (str): The stage name, e.g. metadata or geocoding.
+        count (int): The maximum number of threads.
+        tasks (queue.SimpleQueue): The calls waiting to run.
+        threads (list[threading.Thread]): The started threads.
+    """
+
+    def __init__(self, stage: str, count: int) -> None:
+        self.stage: str = stage
+        self.count: int = count
+        self.tasks: queue.SimpleQueue = queue.SimpleQueue()
+        self.threads: list[threading.Thread] = []
+
+    def submit(self, function: Callable[..., Any], arguments: dict) -> Future:
+        """Run the function in one of the threads, once one is free.
+
+        Args:
+            function (Callable[..., Any]): The function to run.
+            arguments (dict): The keyword arguments of the function.
+
+        Returns:
+            Future: The future of the function.
+        """
+        future: Future = Future()
+        self.tasks.put((future, function, arguments))
+
+        # Start another thread, if there are not enough already.
+        if len(self.threads) < self.count:
+            thread: threading.Thread = threading.Thread(
+                target=self.run, name=self.stage, daemon=True
+            )
+            thread.start()
+            self.threads.append(thread)
+        return future
+
+    def run(self) -> None:
+        """Run the waiting calls, one after the other, skipping the ones
+        cancelled in the meantime.
+        """
+        while True:
+            future, function, arguments = self.tasks.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(function(**arguments))
+            except BaseException as exception:
+                future.set_exception(exception)
+
+
+def run_with_deadline(
+    workers: StageWorkers,
+    function: Callable[..., Any],
+    arguments: dict,
+    deadline: float | None,
+    future: Future | None = None,
+) -> Any:
+    """Run the function, waiting for it up to the deadline.
+    The function runs in one of the stage threads, so a hung call neither
+    blocks the caller nor the next calls, and can still be waited for later.
+
+    Args:
+        workers (StageWorkers): The threads of the stage.
+        function (Callable[..., Any]): The function to run.
+        arguments (dict): The keyword arguments of the function.
+        deadline (float | None):
+            The seconds to wait for, or None to run the function directly.
+        future (Future | None, optional):
+            The future of a previous run that exceeded its deadline, to wait
+            for instead of running the function again. Defaults to None.
+
+    Raises:
+        DeadlineExceeded: If the function did not finish before the deadline.
+
+    Returns:
+        Any: The result of the function.
+    """
+
+    # Run the function directly, if there is no deadline.
+    if deadline is None and future is None:
+        return function(**arguments)
+
+    # Run the function in a stage thread, if not already running.
+    if future is None:
+        future = workers.submit(function=function, arguments=arguments)
+
+    # Wait for the function to finish, up to the deadline.
+    try:
+        return future.result(timeout=deadline)
+    except TimeoutError:
+        # Raised by the function itself.
+        if future.done():
+            raise
+        raise DeadlineExceeded(stage=workers.stage, future=future) from None
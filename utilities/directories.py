@@ -0,0 +1,179 @@
+import os
+import sqlite3
+from collections.abc import Iterator
+from hashlib import blake2b
+from pathlib import Path
+
+from utilities.database import STATE_DIRECTORY_NAME
+
+# The summary of a directory, consisting of its entry count, its own
+# modification time in nanoseconds and a digest of its child names.
+# Child directories are summarized separately, so a change deep inside the
+# tree only marks the directory it happened in as changed.
+DirectorySummary = tuple[int, int, str]
+
+
+def list_directory(
+    directory_path: Path, modification_time: int
+) -> tuple[DirectorySummary, list[Path], list[tuple[Path, int]]]:
+    """List the directory, skipping the state directory, and summarize it.
+    Only its child directories are stat-ed, so listing costs about one system
+    call per directory, not per file.
+
+    Args:
+        directory_path (Path): The directory path.
+        modification_time (int):
+            The modification time of the directory, in nanoseconds.
+
+    Raises:
+        OSError: If the directory cannot be listed.
+
+    Returns:
+        tuple[DirectorySummary, list[Path], list[tuple[Path, int]]]:
+            The directory summary, its sorted file paths and its child
+            directory paths, along with their modification time.
+    """
+
+    # List the directory entries, skipping the state directory.
+    names: list[str] = []
+    file_paths: list[Path] = []
+    subdirectories: list[tuple[Path, int]] = []
+    with os.scandir(directory_path) as entries:
+        for entry in entries:
+            if entry.name == STATE_DIRECTORY_NAME:
+                continue
+            names.append(entry.name)
+            if entry.is_dir(follow_symlinks=False):
+                subdirectories.append(
+                    (
+                        Path(entry.path),
+                        entry.stat(follow_symlinks=False).st_mtime_ns,
+                    )
+                )
+            else:
+                file_paths.append(Path(entry.path))
+
+    # Digest the sorted child names, so the listing order does not matter.
+    names_digest: str = blake2b(
+        "\0".join(sorted(names)).encode(errors="surrogateescape"),
+        digest_size=16,
+    ).hexdigest()
+
+    # Finally, return the summary, the files and the child directories.
+    return (
+        (len(names), modification_time, names_digest),
+        sorted(file_paths),
+        subdirectories,
+    )
+
+
+def summarize_directory(directory_path: Path) -> DirectorySummary:
+    """Summarize a single directory, e.g. after its media files were moved.
+
+    Args:
+        directory_path (Path): The directory path.
+
+    Raises:
+        OSError: If the directory cannot be listed.
+
+    Returns:
+        DirectorySummary: The directory summary.
+    """
+    summary, _, _ = list_directory(
+        directory_path=directory_path,
+        modification_time=directory_path.stat().st_mtime_ns,
+    )
+    return summary
+
+
+def walk_directories(
+    directory_path: Path,
+) -> Iterator[tuple[Path, DirectorySummary, list[Path]]]:
+    """Walk the directory and its subdirectories, summarizing each of them.
+    Each directory is listed once and only directories are stat-ed,
+    so walking costs about one system call per directory, not per file.
+
+    Args:
+        directory_path (Path): The directory path.
+
+    Yields:
+        Iterator[tuple[Path, DirectorySummary, list[Path]]]:
+            The directory path, its summary and its file paths.
+    """
+
+    # The directories left to walk, along with their modification time.
+    directories: list[tuple[Path, int]] = [
+        (directory_path, directory_path.stat().st_mtime_ns)
+    ]
+    while directories:
+        current_directory, modification_time = directories.pop()
+
+        # List and summarize the directory.
+        try:
+            summary, file_paths, subdirectories = list_directory(
+                directory_path=current_directory,
+                modification_time=modification_time,
+            )
+        except OSError as exception:
+            print(f"Error listing {current_directory}: {exception}")
+            continue
+
+        yield current_directory, summary, file_paths
+
+        # Walk the subdirectories in alphabetical order.
+        directories.extend(sorted(subdirectories, reverse=True))
+
+
+def load_directory_summaries(
+    connection: sqlite3.Connection, configuration: str
+) -> dict[str, DirectorySummary]:
+    """Load the directory summaries stored by the previous run.
+    Summaries stored with a different configuration are ignored, as their
+    media files would now be organized differently.
+
+    Args:
+        connection (sqlite3.Connection): The state database connection.
+        configuration (str): The current serialized configuration.
+
+    Returns:
+        dict[str, DirectorySummary]: The summaries, per directory path.
+    """
+    return {
+        directory_path: (entry_count, modification_time, names_digest)
+        for (
+            directory_path,
+            entry_count,
+            modification_time,
+            names_digest,
+        ) in connection.execute(
+            "SELECT directory_path, entry_count, max_modification_time,"
+            " names_digest FROM directory_summaries WHERE configuration = ?",
+            (configuration,),
+        )
+    }
+
+
+def save_directory_summaries(
+    connection: sqlite3.Connection,
+    configuration: str,
+    summaries: dict[str, DirectorySummary],
+) -> None:
+    """Replace the stored directory summaries with the given ones.
+
+    Args:
+        connection (sqlite3.Connection): The state database connection.
+        configuration (str): The current serialized configuration.
+        summaries (dict[str, DirectorySummary]):
+            The summaries, per directory path.
+    """
+    with connection:
+        connection.execute("DELETE FROM directory_summaries")
+        connection.executemany(
+            "INSERT INTO directory_summaries (directory_path, configuration,"
+            " entry_count, max_modification_time, names_digest)"
+            " VALUES (?, ?, ?, ?, ?)",
+            [
+                (directory_path, configuration, *summary)
+                for directory_path, summary in summaries.items()
+            ],
+        )
@@ -0,0 +1,104 @@
+import sqlite3
+from pathlib import Path
+
+
+class GeocodeQueue:
+    """Queue media files to be relocated in the state database, in batches,
+    so that queuing them does not slow renaming them down.
+
+    Attributes:
+        connection (sqlite3.Connection): The state database connection.
+        batch_size (int): The number of media files to queue at once.
+        media_files (list[tuple[str, float, float]]):
+            The media files not yet queued, with their coordinates.
+    """
+
+    def __init__(
+        self, connection: sqlite3.Connection, batch_size: int = 500
+    ) -> None:
+        self.connection: sqlite3.Connection = connection
+        self.batch_size: int = batch_size
+        self.media_files: list[tuple[str, float, float]] = []
+
+    def enqueue(
+        self, media_path: Path, latitude: float, longitude: float
+    ) -> None:
+        """Queue the media file to be relocated, once its location is found.
+        Its absolute path is queued, so that relocating from another working
+        directory still finds it.
+
+        Args:
+            media_path (Path): The path to the media file.
+            latitude (float): The latitude the media file was taken.
+            longitude (float): The longitude the media file was taken.
+        """
+        self.media_files.append(
+            (str(media_path.absolute()), latitude, longitude)
+        )
+        if len(self.media_files) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Store the media files not yet queued."""
+        if not self.media_files:
+            return
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO geocode_queue (media_path, latitude,"
+                " longitude) VALUES (?, ?, ?)",
+                self.media_files,
+            )
+        self.media_files = []
+
+
+def load_queued_media_files(
+    connection: sqlite3.Connection,
+) -> list[tuple[Path, float, float]]:
+    """Load the media files queued to be relocated, ordered by coordinates,
+    so that media files taken at the same place are next to each other.
+
+    Args:
+        connection (sqlite3.Connection): The state database connection.
+
+    Returns:
+        list[tuple[Path, float, float]]:
+            The path, latitude and longitude of each queued media file.
+    """
+    return [
+        (Path(media_path), latitude, longitude)
+        for media_path, latitude, longitude in connection.execute(
+            "SELECT media_path, latitude, longitude FROM geocode_queue"
+            " ORDER BY latitude, longitude"
+        )
+    ]
+
+
+def dequeue_media_files(
+    connection: sqlite3.Connection, media_paths: list[Path]
+) -> None:
+    """Remove the media files from the relocation queue.
+
+    Args:
+        connection (sqlite3.Connection): The state database connection.
+        media_paths (list[Path]): The paths to the media files.
+    """
+    with connection:
+        connection.executemany(
+            "DELETE FROM geocode_queue WHERE media_path = ?",
+            [(str(media_path),) for media_path in media_paths],
+        )
+
+
+def count_queued_media_files(connection: sqlite3.Connection) -> int:
+    """Count the media files queued to be relocated.
+
+    Args:
+        connection (sqlite3.Connection): The state database connection.
+
+    Returns:
+        int: The number of queued media files.
+    """
+    (count,) = connection.execute(
+        "SELECT COUNT(*) FROM geocode_queue"
+    ).fetchone()
+    return count
@@ -0,0 +1,106 @@
+import sqlite3
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+
+def create_run_id() -> str:
+    """Create a unique identifier for a run, starting with its datetime.
+
+    Returns:
+        str: The run identifier, e.g. 20230714T183022-1a2b3c.
+    """
+    return f"{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+class MoveHistory:
+    """Record the moves of a run in the state database.
+    Each move is committed as soon as it is made, so that a crashed or killed
+    run can still be undone.
+
+    Attributes:
+        connection (sqlite3.Connection): The state database connection.
+        run_id (str): The run identifier.
+        sequence (int): The sequence number of the next move.
+    """
+
+    def __init__(self, connection: sqlite3.Connection, run_id: str) -> None:
+        self.connection: sqlite3.Connection = connection
+        self.run_id: str = run_id
+        self.sequence: int = 0
+
+    def record(self, media_path: Path, new_media_path: Path) -> None:
+        """Record a move, with the absolute paths of the file, so that it can
+        be undone from another working directory.
+
+        Args:
+            media_path (Path): The path the file was moved from.
+            new_media_path (Path): The path the file was moved to.
+        """
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO move_history (run_id, sequence, media_path,"
+                " new_media_path) VALUES (?, ?, ?, ?)",
+                (
+                    self.run_id,
+                    self.sequence,
+                    str(media_path.absolute()),
+                    str(new_media_path.absolute()),
+                ),
+            )
+        self.sequence += 1
+
+
+def load_run_moves(
+    connection: sqlite3.Connection, run_id: str
+) -> list[tuple[int, Path, Path]]:
+    """Load the moves of the run, from the last to the first.
+
+    Args:
+        connection (sqlite3.Connection): The state database connection.
+        run_id (str): The run identifier.
+
+    Returns:
+        list[tuple[int, Path, Path]]:
+            The sequence number, and the old and new path of each moved file.
+    """
+    return [
+        (sequence, Path(media_path), Path(new_media_path))
+        for sequence, media_path, new_media_path in connection.execute(
+            "SELECT sequence, media_path, new_media_path FROM move_history"
+            " WHERE run_id = ? ORDER BY sequence DESC",
+            (run_id,),
+        )
+    ]
+
+
+def load_runs(connection: sqlite3.Connection) -> list[tuple[str, int]]:
+    """Load the recorded runs, from the oldest to the latest.
+
+    Args:
+        connection (sqlite3.Connection): The state database connection.
+
+    Returns:
+        list[tuple[str, int]]: The identifier and move count of each run.
+    """
+    return connection.execute(
+        "SELECT run_id, COUNT(*) FROM move_history"
+        " GROUP BY run_id ORDER BY MIN(rowid)"
+    ).fetchall()
+
+
+def delete_run_moves(
+    connection: sqlite3.Connection, run_id: str, sequences: list[int]
+) -> None:
+    """Delete the recorded moves of the run, e.g. once they are undone.
+
+    Args:
+        connection (sqlite3.Connection): The state database connection.
+        run_id (str): The run identifier.
+        sequences (list[int]): The sequence numbers of the moves.
+    """
+    with connection:
+        connection.executemany(
+            "DELETE FROM move_history WHERE run_id = ? AND sequence = ?",
+            [(run_id, sequence) for sequence in sequences],
+        )
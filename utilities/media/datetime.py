@@ -1,18 +1,37 @@
-from datetime import datetime
+from __future__ import annotations
 
-from exifread.classes import IfdTag
+from datetime import datetime
+from typing import TYPE_CHECKING
 
+from enumerations.filename_datetime_policy import FilenameDatetimePolicy
 from enumerations.media_type import MediaType
 from helpers.datetime import get_oldest_datetime
+from utilities.media.location import extract_metadata_latitude_longitude
+from utilities.media.time_zone import extract_metadata_offset, get_time_zone_at
+
+# Only needed for type checking, to avoid importing exifread on startup.
+if TYPE_CHECKING:
+    from exifread.classes import IfdTag
+
+# The naming datetime format used, if none is given.
+DEFAULT_NAMING_DATETIME_FORMAT: str = "%Y_%m_%d_T%H_%M_%S"
 
 
-def extract_metadata_datetime(metadata: dict, media_path: str) -> datetime:
+def extract_metadata_datetime(
+    metadata: dict,
+    media_path: str,
+    fallback_datetime: datetime | None = None,
+) -> datetime:
     """Extract the datetime the picture was taken.
-    If the datetime is not available, return the current one.
+    If the datetime is not available, return the fallback one, if available,
+    otherwise the oldest one of the media file.
+    If the UTC offset is available, the returned datetime is offset aware.
 
     Args:
         metadata (dict): The media file metadata.
         media_path (str): The path to the media file.
+        fallback_datetime (datetime | None, optional):
+            The datetime to return if not available. Defaults to None.
 
     Returns:
         datetime: The datetime object when the image was taken.
@@ -22,8 +41,8 @@ def extract_metadata_datetime(metadata: dict, media_path: str) -> datetime:
     datetime_taken: datetime
 
     # Extract the datetime the picture was taken.
-    metadata_datetime_taken: IfdTag | None = metadata.get(
-        "EXIF DateTimeOriginal", None
+    metadata_datetime_taken: IfdTag | None = (
+        metadata.get("EXIF DateTimeOriginal", None) if metadata else None
     )
 
     # If the datetime is available, proceed.
@@ -33,12 +52,21 @@ def extract_metadata_datetime(metadata: dict, media_path: str) -> datetime:
             datetime_taken = datetime.strptime(
                 str(metadata_datetime_taken), "%Y:%m:%d %H:%M:%S"
             )
+
+            # Attach the UTC offset the picture was taken at, if available.
+            offset = extract_metadata_offset(metadata=metadata)
+            if offset:
+                datetime_taken = datetime_taken.replace(tzinfo=offset)
         except ValueError:
-            # Otherwise, get the oldest datetime when the image was created.
-            datetime_taken = get_oldest_datetime(media_path=media_path)
+            # Otherwise, get the fallback or the oldest datetime.
+            datetime_taken = fallback_datetime or get_oldest_datetime(
+                media_path=media_path
+            )
     else:
-        # Otherwise, get the oldest datetime when the image was created.
-        datetime_taken = get_oldest_datetime(media_path=media_path)
+        # Otherwise, get the fallback or the oldest datetime.
+        datetime_taken = fallback_datetime or get_oldest_datetime(
+            media_path=media_path
+        )
 
     # Finally, return the datetime when the image was generated.
     return datetime_taken
@@ -63,8 +91,12 @@ def format_datetime(
     """
 
     # Convert the datetime using the provided time zone.
+    # Offset naive datetimes are considered to be in the local time zone.
     if time_zone:
-        datetime_taken = datetime_taken.astimezone(time_zone)
+        # Imported only when needed, to speed up the startup.
+        import pytz
+
+        datetime_taken = datetime_taken.astimezone(pytz.timezone(time_zone))
     else:
         datetime_taken = datetime_taken.astimezone()
 
@@ -72,7 +104,7 @@ def format_datetime(
     if naming_datetime_format:
         return datetime_taken.strftime(naming_datetime_format)
     else:
-        return datetime_taken.strftime("%Y_%m_%d_T%H_%M_%S")
+        return datetime_taken.strftime(DEFAULT_NAMING_DATETIME_FORMAT)
 
 
 def get_datetime_taken(
@@ -81,6 +113,12 @@ def get_datetime_taken(
     media_path: str,
     naming_datetime_format: str = None,
     time_zone: str = None,
+    time_zone_searching: bool = False,
+    filename_datetime: datetime | None = None,
+    filename_datetime_policy: FilenameDatetimePolicy = (
+        FilenameDatetimePolicy.FALLBACK
+    ),
+    named_datetime: datetime | None = None,
 ) -> datetime:
     """Get the datetime the picture was taken.
 
@@ -92,18 +130,80 @@ def get_datetime_taken(
             The format to use for converting. Defaults to None.
         time_zone (str, optional):
             The time zone to use for converting. Defaults to None.
+        time_zone_searching (bool, optional):
+            If True, the time zone the picture was taken at will be used for
+            converting instead, when found from the GPS coordinates.
+            Defaults to False.
+        filename_datetime (datetime | None, optional):
+            The datetime taken found in the filename. Defaults to None.
+        filename_datetime_policy (FilenameDatetimePolicy, optional):
+            When to use the datetime taken found in the filename.
+            Defaults to FilenameDatetimePolicy.FALLBACK.
+        named_datetime (datetime | None, optional):
+            The datetime taken found in the filename, if the media file is
+            already named with the naming format, which is used like the
+            filename datetime and takes precedence over it.
+            Defaults to None.
 
     Returns:
         datetime: The datetime object when the image was taken.
     """
 
+    # Ignore the filename datetimes, if they should never be used.
+    if filename_datetime_policy is FilenameDatetimePolicy.NEVER:
+        filename_datetime = None
+        named_datetime = None
+
+    # Use the datetime of the media file already named, if available.
+    if named_datetime is not None:
+        filename_datetime = named_datetime
+
     # Extract the datetime if available.
     # TODO: Check if there is a valid tool to get video datetime metadata.
-    datetime_taken: datetime = (
-        extract_metadata_datetime(metadata=metadata, media_path=media_path)
-        if media_type is MediaType.IMAGE
-        else get_oldest_datetime(media_path=media_path)
-    )
+    datetime_taken: datetime
+    if (
+        filename_datetime
+        and filename_datetime_policy is FilenameDatetimePolicy.PREFER
+    ):
+        datetime_taken = filename_datetime
+    elif media_type is MediaType.IMAGE:
+        datetime_taken = extract_metadata_datetime(
+            metadata=metadata,
+            media_path=media_path,
+            fallback_datetime=filename_datetime,
+        )
+    else:
+        datetime_taken = filename_datetime or get_oldest_datetime(
+            media_path=media_path
+        )
+
+    # Keep the name of the media file already named, as its datetime is
+    # already in the time zone it would be converted to.
+    if named_datetime is not None and datetime_taken is named_datetime:
+        return named_datetime.strftime(
+            naming_datetime_format or DEFAULT_NAMING_DATETIME_FORMAT
+        )
+
+    # Use the local time zone the picture was taken at, if found.
+    if time_zone_searching and media_type is MediaType.IMAGE and metadata:
+        latitude, longitude = extract_metadata_latitude_longitude(
+            metadata=metadata
+        )
+        capture_time_zone: str | None = get_time_zone_at(
+            latitude=latitude, longitude=longitude
+        )
+        if capture_time_zone:
+            time_zone = capture_time_zone
+
+            # Offset naive datetimes are already the local time the picture
+            # was taken at, so only attach the time zone to them.
+            if datetime_taken.tzinfo is None:
+                # Imported only when needed, to speed up the startup.
+                import pytz
+
+                datetime_taken = pytz.timezone(capture_time_zone).localize(
+                    datetime_taken
+                )
 
     # Finally, return the formatted datetime.
     return format_datetime(
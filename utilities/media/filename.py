@@ -0,0 +1,158 @@
+import re
+from datetime import UTC, datetime
+from functools import lru_cache
+from pathlib import Path
+
+from helpers.datetime import get_oldest_datetime
+from utilities.media.datetime import DEFAULT_NAMING_DATETIME_FORMAT
+from utilities.media.operations import COPY_SUFFIX_PATTERN
+
+# The filename patterns containing the datetime taken, tried in order.
+# The year, month and day groups are required, the hour, minute and second
+# ones are optional and default to the time of day of the file itself, if
+# on the same day, otherwise to midnight. The datetime is in local time,
+# unless the pattern matches an empty utc group, e.g. (?P<utc>).
+DEFAULT_FILENAME_DATETIME_PATTERNS: tuple[str, ...] = (
+    # Google Pixel phones, in UTC, e.g. PXL_20230714_183022123.
+    (
+        r"^PXL_(?P<year>\d{4})(?P<month>\d{2})(?P<day>\d{2})_(?P<hour>\d{2})"
+        r"(?P<minute>\d{2})(?P<second>\d{2})\d{3}(?P<utc>)"
+    ),
+    # Cameras and phones, e.g. IMG_20230714_183022, VID_20230714_183022
+    # or Screenshot_20230714-183022.
+    (
+        r"^(?:IMG|VID|MVIMG|PANO|Screenshot)[_-](?P<year>\d{4})"
+        r"(?P<month>\d{2})(?P<day>\d{2})[_-](?P<hour>\d{2})(?P<minute>\d{2})"
+        r"(?P<second>\d{2})"
+    ),
+    # WhatsApp exports, e.g. IMG-20230714-WA0001, without the time.
+    r"^(?:IMG|VID)-(?P<year>\d{4})(?P<month>\d{2})(?P<day>\d{2})-WA\d+",
+    # Camera uploads, e.g. 2023-07-14 18.30.22.
+    (
+        r"^(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})[ _](?P<hour>\d{2})"
+        r"[.:-]?(?P<minute>\d{2})[.:-]?(?P<second>\d{2})"
+    ),
+)
+
+# The named groups of the patterns, to be numbered per pattern.
+GROUP_PATTERN: re.Pattern = re.compile(r"\(\?P<(\w+)>")
+
+
+@lru_cache(maxsize=8)
+def compile_filename_datetime_patterns(
+    patterns: tuple[str, ...],
+) -> re.Pattern:
+    """Compile the filename patterns into a single pattern, so that each
+    filename is matched against all of them at once.
+
+    Args:
+        patterns (tuple[str, ...]): The filename patterns.
+
+    Returns:
+        re.Pattern:
+            The compiled pattern, with its groups numbered per pattern,
+            e.g. year_0, year_1 etc.
+    """
+    return re.compile(
+        "|".join(
+            "(?:" + GROUP_PATTERN.sub(rf"(?P<\g<1>_{index}>", pattern) + ")"
+            for index, pattern in enumerate(patterns)
+        ),
+        re.IGNORECASE,
+    )
+
+
+def extract_filename_datetime(
+    media_path: Path,
+    patterns: tuple[str, ...] = DEFAULT_FILENAME_DATETIME_PATTERNS,
+) -> datetime | None:
+    """Extract the datetime the media file was taken from its filename.
+
+    Args:
+        media_path (Path): The path to the media file.
+        patterns (tuple[str, ...], optional):
+            The filename patterns.
+            Defaults to DEFAULT_FILENAME_DATETIME_PATTERNS.
+
+    Returns:
+        datetime | None:
+            The datetime taken, if found and valid, offset aware when the
+            filename is in UTC, or when the time of day is taken from the
+            file itself.
+    """
+
+    # Match the filename, without its extension.
+    match: re.Match | None = compile_filename_datetime_patterns(
+        patterns=patterns
+    ).search(media_path.stem)
+    if not match:
+        return None
+
+    # Keep the groups of the matched pattern, without their number.
+    groups: dict[str, str] = {
+        name.rsplit("_", 1)[0]: value
+        for name, value in match.groupdict().items()
+        if value is not None
+    }
+
+    # Return the datetime if valid, otherwise None.
+    try:
+        datetime_taken: datetime = datetime(
+            year=int(groups["year"]),
+            month=int(groups["month"]),
+            day=int(groups["day"]),
+            hour=int(groups.get("hour", 0)),
+            minute=int(groups.get("minute", 0)),
+            second=int(groups.get("second", 0)),
+            tzinfo=UTC if "utc" in groups else None,
+        )
+    except (KeyError, ValueError):
+        return None
+
+    # Finally, take the time of day from the file itself, if the filename
+    # only contains the date, e.g. WhatsApp exports, so that the media files
+    # of the same day are not all named after midnight.
+    if "hour" not in groups:
+        try:
+            oldest_datetime: datetime = get_oldest_datetime(
+                media_path=media_path
+            )
+        except OSError:
+            return datetime_taken
+        if oldest_datetime.date() == datetime_taken.date():
+            return oldest_datetime
+    return datetime_taken
+
+
+def extract_named_datetime(
+    media_path: Path, naming_datetime_format: str | None = None
+) -> datetime | None:
+    """Extract the datetime taken from the filename of a media file already
+    named with the naming format, e.g. on a previous run, so that renaming it
+    again keeps its name.
+
+    Args:
+        media_path (Path): The path to the media file.
+        naming_datetime_format (str | None, optional):
+            The naming format. Defaults to None, for the default one.
+
+    Returns:
+        datetime | None:
+            The datetime taken, in the time zone the media file was named in,
+            if named with the naming format.
+    """
+
+    # Parse the filename, without its extension, and with or without the
+    # copy suffix, e.g. C1.
+    for stem in dict.fromkeys(
+        (media_path.stem, COPY_SUFFIX_PATTERN.sub("", media_path.stem))
+    ):
+        try:
+            return datetime.strptime(
+                stem, naming_datetime_format or DEFAULT_NAMING_DATETIME_FORMAT
+            )
+        except ValueError:
+            continue
+
+    # Otherwise, return None.
+    return None
@@ -1,15 +1,36 @@
-from re import search
+from __future__ import annotations
 
-from exifread.classes import IfdTag
-from geopy.exc import GeocoderTimedOut
-from geopy.geocoders.nominatim import Nominatim
-from geopy.location import Location
-from unidecode import unidecode
+from pathlib import Path
+from re import search
+from typing import TYPE_CHECKING
 
 from enumerations.media_type import MediaType
 from helpers.degrees import convert_metadata_location_to_degrees
 from helpers.strings import remove_special_characters, remove_words
 
+# Only needed for type checking, to avoid importing exifread and geopy on
+# startup, when location searching is disabled.
+if TYPE_CHECKING:
+    from exifread.classes import IfdTag
+    from geopy.geocoders.nominatim import Nominatim
+    from geopy.location import Location
+
+# The number of decimals the coordinates are rounded to, before caching
+# their location. Four decimals give tiles of about eleven meters.
+LOCATION_TILE_PRECISION: int = 4
+
+
+def create_geo_locator() -> Nominatim:
+    """Create the geolocator used for converting coordinates to locations.
+
+    Returns:
+        Nominatim: The geolocator.
+    """
+    # Imported only when needed, to speed up the startup.
+    from geopy.geocoders.nominatim import Nominatim
+
+    return Nominatim(user_agent="geoapiExercises", timeout=10)
+
 
 def extract_metadata_latitude_longitude(
     metadata: dict,
@@ -32,7 +53,7 @@ def extract_metadata_latitude_longitude(
     longitude: IfdTag | None = metadata.get("GPS GPSLongitude", None)
 
     # If latitude and longitude are available, proceed, otherwise return None.
-    if latitude and longitude:
+    if latitude and longitude and latitude_reference and longitude_reference:
         # Convert the latitude to degrees.
         latitude = convert_metadata_location_to_degrees(latitude)
 
@@ -54,15 +75,26 @@ def extract_metadata_latitude_longitude(
 
 
 def convert_metadata_latitude_longitude_to_location(
-    latitude: float | None, longitude: float | None, retries: int = 0
+    latitude: float | None,
+    longitude: float | None,
+    geo_locator: Nominatim | None = None,
+    retries: int = 0,
 ) -> tuple[str | None, str | None]:
     """Convert the latitude and longitude to a location.
 
     Args:
         latitude (float | None): The latitude.
         longitude (float | None): The longitude.
+        geo_locator (Nominatim | None, optional):
+            The geolocator to reuse, otherwise a new one is created.
+            Defaults to None.
         retries (int, optional): The retried attempts counter. Defaults to 0.
 
+    Raises:
+        GeopyError:
+            If the geolocator failed, e.g. timed out more than 3 times,
+            so that failing is not mistaken for no location.
+
     Returns:
         tuple[str | None, str | None, str | None, str | None]:
             The city, municipality, region and country.
@@ -72,8 +104,12 @@ def convert_metadata_latitude_longitude_to_location(
     if latitude is None or longitude is None:
         return None, None, None, None
 
-    # Initialize the geolocator.
-    geo_locator: Nominatim = Nominatim(user_agent="geoapiExercises", timeout=10)
+    # Imported only when needed, to speed up the startup.
+    from geopy.exc import GeocoderTimedOut
+
+    # Initialize the geolocator, if not provided.
+    if geo_locator is None:
+        geo_locator = create_geo_locator()
     try:
         # Get the location from the coordinates.
         location: Location = geo_locator.reverse(
@@ -83,10 +119,12 @@ def convert_metadata_latitude_longitude_to_location(
         # Recursive retry up to 3 times.
         if retries < 3:
             return convert_metadata_latitude_longitude_to_location(
-                latitude=latitude, longitude=longitude, retries=retries + 1
+                latitude=latitude,
+                longitude=longitude,
+                geo_locator=geo_locator,
+                retries=retries + 1,
             )
-        else:
-            return None, None, None, None
+        raise
 
     # Proceed if the location is available, otherwise return None.
     if location:
@@ -163,6 +201,9 @@ def format_location(location: str | None) -> str | None:
 
     # Proceed if it is valid, otherwise return None.
     if location:
+        # Imported only when needed, to speed up the startup.
+        from unidecode import unidecode
+
         # Trim all leading and trailing whitespaces.
         location = location.strip()
 
@@ -208,7 +249,10 @@ def format_location(location: str | None) -> str | None:
 
 
 def get_location_taken(
-    metadata: dict, media_type: MediaType
+    metadata: dict,
+    media_type: MediaType,
+    geo_locator: Nominatim | None = None,
+    location_cache: dict | None = None,
 ) -> tuple[str | None, str | None]:
     """Get the location the picture was taken.
     We will return the location and the country.
@@ -216,6 +260,15 @@ def get_location_taken(
     Args:
         metadata (dict): The media file metadata.
         media_type (MediaType): The type of the media file.
+        geo_locator (Nominatim | None, optional):
+            The geolocator to reuse, otherwise a new one is created.
+            Defaults to None.
+        location_cache (dict | None, optional):
+            The formatted locations already found, per coordinates tile,
+            which is updated with the found location. Defaults to None.
+
+    Raises:
+        GeopyError: If the geolocator failed.
 
     Returns:
         tuple[str | None, str | None, str | None]:
@@ -224,26 +277,143 @@ def get_location_taken(
     """
 
     # Proceed if the media type is image, otherwise return None.
-    if media_type is MediaType.IMAGE:
+    if media_type is MediaType.IMAGE and metadata:
         # Extract the latitude and longitude if available.
         latitude, longitude = extract_metadata_latitude_longitude(
             metadata=metadata
         )
 
-        # Convert the latitude and longitude to a location if available.
-        city, municipality, region, country = (
-            convert_metadata_latitude_longitude_to_location(
-                latitude=latitude, longitude=longitude
-            )
-        )
-
-        # Finally, return the formatted city, municipality, region and country.
-        return (
-            format_location(location=city),
-            format_location(location=municipality),
-            format_location(location=region),
-            format_location(location=country),
+        # Finally, return the formatted location.
+        return get_location_at(
+            latitude=latitude,
+            longitude=longitude,
+            geo_locator=geo_locator,
+            location_cache=location_cache,
         )
     else:
         # TODO: Check if there is a valid tool to get video location metadata.
-        return None, None
+        return None, None, None, None
+
+
+def get_location_at(
+    latitude: float | None,
+    longitude: float | None,
+    geo_locator: Nominatim | None = None,
+    location_cache: dict | None = None,
+) -> tuple[str | None, str | None, str | None, str | None]:
+    """Get the formatted location at the given coordinates.
+
+    Args:
+        latitude (float | None): The latitude.
+        longitude (float | None): The longitude.
+        geo_locator (Nominatim | None, optional):
+            The geolocator to reuse, otherwise a new one is created.
+            Defaults to None.
+        location_cache (dict | None, optional):
+            The formatted locations already found, per coordinates tile,
+            which is updated with the found location. Defaults to None.
+
+    Raises:
+        GeopyError: If the geolocator failed.
+
+    Returns:
+        tuple[str | None, str | None, str | None, str | None]:
+            The formatted city, municipality, region and country.
+    """
+
+    # Proceed if the latitude and longitude are valid, otherwise return None.
+    if latitude is None or longitude is None:
+        return None, None, None, None
+
+    # Return the cached location of the coordinates tile, if available.
+    tile: tuple[float, float] = (
+        round(latitude, LOCATION_TILE_PRECISION),
+        round(longitude, LOCATION_TILE_PRECISION),
+    )
+    if location_cache is not None and tile in location_cache:
+        return location_cache[tile]
+
+    # Convert the latitude and longitude to a location if available.
+    city, municipality, region, country = (
+        convert_metadata_latitude_longitude_to_location(
+            latitude=latitude, longitude=longitude, geo_locator=geo_locator
+        )
+    )
+
+    # Format the city, municipality, region and country.
+    location: tuple[str | None, str | None, str | None, str | None] = (
+        format_location(location=city),
+        format_location(location=municipality),
+        format_location(location=region),
+        format_location(location=country),
+    )
+
+    # Finally, cache and return the formatted location.
+    # Locations not found are cached too, as the geolocator raises if failed.
+    if location_cache is not None:
+        location_cache[tile] = location
+    return location
+
+
+def get_location_directory(
+    base_directory: Path,
+    city: str | None,
+    municipality: str | None,
+    region: str | None,
+    country: str | None,
+) -> Path | None:
+    """Get the directory the media file should be moved to, according to
+    the formatted location it was taken.
+
+    Args:
+        base_directory (Path):
+            The base directory where the media files are stored.
+        city (str | None): The formatted city.
+        municipality (str | None): The formatted municipality.
+        region (str | None): The formatted region.
+        country (str | None): The formatted country.
+
+    Returns:
+        Path | None: The location directory, if any location is available.
+    """
+
+    # Create a potential destination path based on the country, region
+    # and city.
+    potential_destination_directory: Path = base_directory
+
+    # Flag to keep track if the media file should be moved,
+    # according to location metadata.
+    should_be_moved: bool = False
+
+    # If the country is valid, then add it to the potential destination.
+    if country:
+        should_be_moved = True
+        potential_destination_directory = (
+            potential_destination_directory / country
+        )
+
+    # If the region is valid and different to country, add it to the
+    # potential destination.
+    if region and region != country:
+        should_be_moved = True
+        potential_destination_directory = (
+            potential_destination_directory / region
+        )
+
+    # TODO: Do not create folder if it's the same as country too.
+    # If the municipality is valid and different to region, add it to the
+    # potential destination.
+    if municipality and municipality != region:
+        should_be_moved = True
+        potential_destination_directory = (
+            potential_destination_directory / municipality
+        )
+
+    # If the city is valid and different to the municipality, add it to the
+    # potential destination.
+    if city and city != municipality:
+        should_be_moved = True
+        potential_destination_directory = potential_destination_directory / city
+
+    # Finally, return the destination if the media file should be moved.
+    return potential_destination_directory if should_be_moved else None
@@ -0,0 +1,30 @@
+from pathlib import Path
+
+from enumerations.media_type import MediaType
+
+
+def read_metadata(media_path: Path, media_type: MediaType) -> dict | None:
+    """Read the metadata of the media file.
+
+    Args:
+        media_path (Path): The path to the media file.
+        media_type (MediaType): The type of the media file.
+
+    Returns:
+        dict | None: The media file metadata, if available.
+    """
+
+    # TODO: Check if there is a valid tool to get video metadata.
+    if media_type is not MediaType.IMAGE:
+        return None
+
+    # Imported only when needed, to speed up the startup.
+    import exifread
+
+    # Read the EXIF metadata, without the thumbnail and the maker notes.
+    try:
+        with media_path.open("rb") as media_file:
+            return exifread.process_file(media_file, details=False)
+    except Exception as exception:
+        print(f"Error processing {media_path}: {exception}")
+        return None
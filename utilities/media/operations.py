@@ -1,23 +1,39 @@
+import errno
+import os
+import re
 import shutil
+from collections.abc import Iterable
 from pathlib import Path
 
+from utilities.history import MoveHistory
 
-def move_without_overwrite(media_path: Path, new_media_path: Path) -> None:
-    """Moves a file from one location to another, without overwriting
-    possible existing file at the destination.
+# The suffix appended to the filenames taken by other files, e.g. C1.
+COPY_SUFFIX_PATTERN: re.Pattern = re.compile(r"C\d+$")
+
+
+def get_available_path(
+    new_media_path: Path, reserved_paths: set | None = None
+) -> Path:
+    """Get a path that is not taken, based on the wanted one.
     If a file with the same name exists at the destination,
     the letter C from copy and a number is appended to the filename.
 
     Args:
-        media_path (Path): Path to the source file that needs to be moved.
-        new_media_path (Path):
-            Path to the destination where the file should be moved.
+        new_media_path (Path): The wanted path.
+        reserved_paths (set | None, optional):
+            Paths that are considered taken, even if they do not exist yet.
+            Defaults to None.
+
+    Returns:
+        Path: The available path.
     """
 
     # Check if the file exists at the target location.
     counter: int = 1
     original_stem: str = new_media_path.stem
-    while new_media_path.exists():
+    while new_media_path.exists() or (
+        reserved_paths is not None and new_media_path in reserved_paths
+    ):
         # Append a number to the end of the filename and increase the counter.
         new_stem: str = original_stem + f"C{counter}"
         new_media_path = new_media_path.with_name(
@@ -25,26 +41,116 @@ def move_without_overwrite(media_path: Path, new_media_path: Path) -> None:
         )
         counter += 1
 
-    # Move the file to the new (and possibly modified) path.
-    shutil.move(str(media_path), new_media_path)
+    # Finally, return the available path.
+    return new_media_path
+
 
+def is_available_path_of(media_path: Path, new_media_path: Path) -> bool:
+    """Check if the path is the one or a copy of the one the file should
+    have, e.g. IMG_1C1.jpg for IMG_1.jpg, so that it is not renamed again.
 
-def delete_empty_directories(directory_path: Path) -> None:
+    Args:
+        media_path (Path): The current path of the file.
+        new_media_path (Path): The path the file should have.
+
+    Returns:
+        bool: True if the file does not need to be renamed.
+    """
+    return media_path == new_media_path or (
+        media_path.parent == new_media_path.parent
+        and media_path.suffix == new_media_path.suffix
+        and media_path.stem.startswith(new_media_path.stem)
+        and COPY_SUFFIX_PATTERN.fullmatch(
+            media_path.stem[len(new_media_path.stem) :]
+        )
+        is not None
+    )
+
+
+def move_without_overwrite(
+    media_path: Path,
+    new_media_path: Path,
+    history: MoveHistory | None = None,
+) -> Path:
+    """Moves a file from one location to another, without overwriting
+    possible existing file at the destination.
+    If a file with the same name exists at the destination,
+    the letter C from copy and a number is appended to the filename.
+
+    Args:
+        media_path (Path): Path to the source file that needs to be moved.
+        new_media_path (Path):
+            Path to the destination where the file should be moved.
+        history (MoveHistory | None, optional):
+            The history to record the move in. Defaults to None.
+
+    Returns:
+        Path: The (possibly modified) destination path.
+    """
+
+    # Find a destination path that does not exist.
+    new_media_path = get_available_path(new_media_path=new_media_path)
+
+    # Move the file to the new (and possibly modified) path, renaming it
+    # directly when on the same device, otherwise copying it.
+    try:
+        os.rename(media_path, new_media_path)
+    except OSError as exception:
+        if exception.errno != errno.EXDEV:
+            raise
+        shutil.move(str(media_path), new_media_path)
+
+    # Record the move, if needed.
+    if history is not None:
+        history.record(media_path=media_path, new_media_path=new_media_path)
+
+    # Finally, return the new path.
+    return new_media_path
+
+
+def delete_empty_directories(
+    directory_path: Path, candidate_directories: Iterable[Path] | None = None
+) -> set[Path]:
     """Deletes empty directories recursively.
+    If candidate directories are given, only they and their parents left
+    empty are checked, instead of walking the whole directory.
 
     Args:
         directory_path (Path): The directory path.
+        candidate_directories (Iterable[Path] | None, optional):
+            The directories that may have been left empty, inside the
+            directory. Defaults to None, for all of its subdirectories.
+
+    Returns:
+        set[Path]: The deleted directories.
     """
 
-    # Flag to indicate if a directory was deleted.
-    deleted = True
-
-    # Repeat until no more empty directories are found.
-    while deleted:
-        deleted = False
-        # Iterate through subdirectories, from the deepest to the shallowest.
-        for path in reversed(list(directory_path.rglob("*"))):
-            if path.is_dir() and not any(path.iterdir()):
-                print(f"Deleting empty directory {path}...")
-                path.rmdir()
-                deleted = True
+    # Check all the subdirectories, if no candidates are given.
+    if candidate_directories is None:
+        candidate_directories = [
+            Path(current_directory)
+            for current_directory, _, _ in os.walk(directory_path)
+        ]
+
+    # Iterate through the candidates, from the deepest to the shallowest,
+    # so that parents emptied by deleting their children are deleted too.
+    deleted_directories: set[Path] = set()
+    for path in sorted(
+        set(candidate_directories),
+        key=lambda path: len(path.parts),
+        reverse=True,
+    ):
+        while (
+            path != directory_path
+            and path.is_relative_to(directory_path)
+            and path not in deleted_directories
+            and path.is_dir()
+            and not any(path.iterdir())
+        ):
+            print(f"Deleting empty directory {path}...")
+            path.rmdir()
+            deleted_directories.add(path)
+            path = path.parent
+
+    # Finally, return the deleted directories.
+    return deleted_directories
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import re
+from datetime import timedelta, timezone
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+# Only needed for type checking, to avoid loading the index on startup.
+if TYPE_CHECKING:
+    from timezonefinder import TimezoneFinder
+
+# The number of decimals the coordinates are rounded to, before looking up
+# their time zone. Two decimals give tiles of about one square kilometer.
+TIME_ZONE_TILE_PRECISION: int = 2
+
+# The EXIF offset format, e.g. "+03:00" or "-05:30".
+OFFSET_PATTERN: re.Pattern = re.compile(r"^([+-])(\d{2}):?(\d{2})$")
+
+
+@lru_cache(maxsize=1)
+def get_time_zone_finder() -> TimezoneFinder:
+    """Get the offline time zone finder.
+    The precomputed polygon index is read from disk on demand, instead of
+    being loaded in memory, and is shared between all lookups.
+
+    Returns:
+        TimezoneFinder: The time zone finder.
+    """
+    # Imported only when needed, to speed up the startup.
+    from timezonefinder import TimezoneFinder
+
+    return TimezoneFinder(in_memory=False)
+
+
+@lru_cache(maxsize=65536)
+def get_tile_time_zone(latitude: float, longitude: float) -> str | None:
+    """Get the time zone of a coordinates tile.
+
+    Args:
+        latitude (float): The rounded latitude of the tile.
+        longitude (float): The rounded longitude of the tile.
+
+    Returns:
+        str | None: The IANA time zone name, if found.
+    """
+    return get_time_zone_finder().timezone_at(lng=longitude, lat=latitude)
+
+
+def get_time_zone_at(
+    latitude: float | None, longitude: float | None
+) -> str | None:
+    """Get the time zone at the given coordinates, without any network access.
+    Nearby coordinates share the same cached tile, so consecutive media files
+    taken at the same place only look up the index once.
+
+    Args:
+        latitude (float | None): The latitude.
+        longitude (float | None): The longitude.
+
+    Returns:
+        str | None: The IANA time zone name, e.g. "Europe/Athens", if found.
+    """
+
+    # Proceed if the latitude and longitude are valid, otherwise return None.
+    if latitude is None or longitude is None:
+        return None
+
+    # Look up the time zone of the tile the coordinates belong to.
+    try:
+        return get_tile_time_zone(
+            latitude=round(latitude, TIME_ZONE_TILE_PRECISION),
+            longitude=round(longitude, TIME_ZONE_TILE_PRECISION),
+        )
+    except ValueError:
+        # Coordinates out of bounds.
+        return None
+
+
+def extract_metadata_offset(metadata: dict | None) -> timezone | None:
+    """Extract the UTC offset of the datetime the picture was taken.
+
+    Args:
+        metadata (dict | None): The media file metadata.
+
+    Returns:
+        timezone | None: The UTC offset, if available and valid.
+    """
+
+    # Proceed if the metadata is available, otherwise return None.
+    if not metadata:
+        return None
+
+    # Extract the offset of the original datetime, e.g. "+03:00".
+    metadata_offset = metadata.get("EXIF OffsetTimeOriginal", None)
+    if not metadata_offset:
+        return None
+
+    # Parse the offset, otherwise return None.
+    match: re.Match | None = OFFSET_PATTERN.match(
+        str(metadata_offset).strip().rstrip("\x00")
+    )
+    if not match:
+        return None
+    sign, hours, minutes = match.groups()
+    offset: timedelta = timedelta(hours=int(hours), minutes=int(minutes))
+
+    # Offsets must be strictly between -24 and +24 hours.
+    try:
+        return timezone(-offset if sign == "-" else offset)
+    except ValueError:
+        return None
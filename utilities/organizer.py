@@ -0,0 +1,1148 @@
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Callable, Hashable, Iterable
+from concurrent.futures import Future
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Self
+
+from enumerations.filename_datetime_policy import FilenameDatetimePolicy
+from enumerations.media_type import MediaType
+from utilities.configuration import OrganizerConfiguration
+from utilities.database import connect_database, get_database_path
+from utilities.deadlines import (
+    DeadlineExceeded,
+    StageWorkers,
+    run_with_deadline,
+)
+from utilities.directories import (
+    DirectorySummary,
+    load_directory_summaries,
+    save_directory_summaries,
+    summarize_directory,
+    walk_directories,
+)
+from utilities.geocoding import (
+    GeocodeQueue,
+    count_queued_media_files,
+    dequeue_media_files,
+    load_queued_media_files,
+)
+from utilities.history import (
+    MoveHistory,
+    create_run_id,
+    delete_run_moves,
+    load_run_moves,
+    load_runs,
+)
+from utilities.media.datetime import get_datetime_taken
+from utilities.media.filename import (
+    extract_filename_datetime,
+    extract_named_datetime,
+)
+from utilities.media.location import (
+    LOCATION_TILE_PRECISION,
+    create_geo_locator,
+    extract_metadata_latitude_longitude,
+    get_location_at,
+    get_location_directory,
+    get_location_taken,
+)
+from utilities.media.metadata import read_metadata
+from utilities.media.operations import (
+    delete_empty_directories,
+    get_available_path,
+    is_available_path_of,
+    move_without_overwrite,
+)
+
+# Only needed for type checking, to avoid importing geopy on startup,
+# when location searching is disabled.
+if TYPE_CHECKING:
+    from geopy.geocoders.nominatim import Nominatim
+
+# The media file extensions that you want to process.
+IMAGE_EXTENSIONS: set = {
+    ".jpg",
+    ".jpeg",
+    ".png",
+    ".gif",
+    ".tiff",
+    ".bmp",
+    ".webp",
+    ".heic",
+    ".heif",
+    ".svg",
+    ".ico",
+    ".raw",
+}
+VIDEO_EXTENSIONS: set = {".mp4", ".avi", ".mkv", ".flv", ".wmv"}
+
+# The maximum number of threads running each stage with a deadline.
+# Geocoding runs in a single thread, so that the geocoder never receives
+# concurrent requests and the location cache is written from one thread.
+STAGE_THREAD_COUNTS: dict[str, int] = {"metadata": 4, "geocoding": 1}
+
+
+def get_media_type(media_path: Path) -> MediaType | None:
+    """Get the media type of the file, according to its extension.
+
+    Args:
+        media_path (Path): The path to the file.
+
+    Returns:
+        MediaType | None: The media type, if it is a media file.
+    """
+    suffix: str = media_path.suffix.lower()
+    if suffix in IMAGE_EXTENSIONS:
+        return MediaType.IMAGE
+    elif suffix in VIDEO_EXTENSIONS:
+        return MediaType.VIDEO
+    else:
+        return None
+
+
+class Organizer:
+    """Rename and organize media files.
+    The organizer owns its geolocator, caches and state database connections,
+    and keeps them warm between calls, so that it can be constructed once
+    and reused by long running services. It is not thread safe.
+
+    Attributes:
+        configuration (OrganizerConfiguration): The organizer configuration.
+        geo_locator (Nominatim | None):
+            The geolocator, once a location is searched for the first time.
+        location_cache (dict): The formatted locations, per coordinates tile.
+        directory_summaries (dict[Path, dict[str, DirectorySummary]]):
+            The directory summaries of the last run, per organized directory.
+        connections (dict[Path, sqlite3.Connection]):
+            The state database connections, per organized directory.
+        geocode_queues (dict[Path, GeocodeQueue]):
+            The queues of the media files to be relocated, per organized
+            directory.
+        reserved_paths (set):
+            The name index of the paths planned during the current call.
+        run_id (str | None): The identifier of the current or last run.
+        histories (dict[Path, MoveHistory] | None):
+            The move histories of the current run, per organized directory,
+            or None outside of a run.
+        pending_stages (dict[tuple[str, Hashable], Future]):
+            The stages that exceeded their deadline and are still running,
+            per stage name and key, to be waited for when retried.
+        stage_workers (dict[str, StageWorkers]):
+            The threads running the stages with a deadline, per stage name.
+    """
+
+    def __init__(self, configuration: OrganizerConfiguration) -> None:
+        self.configuration: OrganizerConfiguration = configuration
+        self.geo_locator: Nominatim | None = None
+        self.location_cache: dict = {}
+        self.directory_summaries: dict[Path, dict[str, DirectorySummary]] = {}
+        self.connections: dict[Path, sqlite3.Connection] = {}
+        self.geocode_queues: dict[Path, GeocodeQueue] = {}
+        self.reserved_paths: set = set()
+        self.run_id: str | None = None
+        self.histories: dict[Path, MoveHistory] | None = None
+        self.pending_stages: dict[tuple[str, Hashable], Future] = {}
+        self.stage_workers: dict[str, StageWorkers] = {}
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the state database connections."""
+        self.flush_geocode_queues()
+        self.geocode_queues.clear()
+        for connection in self.connections.values():
+            connection.close()
+        self.connections.clear()
+
+    def organize(self, paths: Iterable[str | Path]) -> list[tuple[Path, Path]]:
+        """Rename and organize the media files in the given paths.
+        Directories are searched recursively and organized in place, while
+        media files are organized in the configured base directory, if any,
+        otherwise in their parent directory.
+        The moves are recorded under a new run identifier, to be undone.
+
+        Args:
+            paths (Iterable[str | Path]): The directory or media file paths.
+
+        Returns:
+            list[tuple[Path, Path]]: The old and new path of each moved file.
+        """
+        self.start_run()
+        try:
+            return self.process(paths=paths, dry_run=False)
+        finally:
+            self.finish_run()
+
+    def plan(self, paths: Iterable[str | Path]) -> list[tuple[Path, Path]]:
+        """Plan how the media files in the given paths would be renamed and
+        organized, without moving any of them.
+
+        Args:
+            paths (Iterable[str | Path]): The directory or media file paths.
+
+        Returns:
+            list[tuple[Path, Path]]:
+                The old and new path of each file that would be moved.
+        """
+        return self.process(paths=paths, dry_run=True)
+
+    def relocate(self, paths: Iterable[str | Path]) -> list[tuple[Path, Path]]:
+        """Move the media files queued while location searching was deferred,
+        to their location directories.
+        The location is found once per coordinates tile, for all the media
+        files taken there, and the queue is updated after each tile, so an
+        interrupted relocation resumes where it stopped.
+        The moves are recorded under a new run identifier, to be undone.
+
+        Args:
+            paths (Iterable[str | Path]): The organized directory paths.
+
+        Returns:
+            list[tuple[Path, Path]]: The old and new path of each moved file.
+        """
+        self.start_run()
+        try:
+            return self.relocate_queued_media_files(paths=paths)
+        finally:
+            self.finish_run()
+
+    def relocate_queued_media_files(
+        self, paths: Iterable[str | Path]
+    ) -> list[tuple[Path, Path]]:
+        """Move the queued media files to their location directories.
+
+        Args:
+            paths (Iterable[str | Path]): The organized directory paths.
+
+        Returns:
+            list[tuple[Path, Path]]: The old and new path of each moved file.
+        """
+        moves: list[tuple[Path, Path]] = []
+        for directory in (Path(path).absolute() for path in paths):
+            # Nothing to relocate if there is no state database.
+            if not get_database_path(directory_path=directory).exists():
+                continue
+            connection: sqlite3.Connection = self.get_connection(
+                directory=directory
+            )
+
+            # Group the queued media files per coordinates tile.
+            tiles: dict[tuple[float, float], list[tuple[Path, float, float]]]
+            tiles = {}
+            for media_path, latitude, longitude in load_queued_media_files(
+                connection=connection
+            ):
+                tiles.setdefault(
+                    (
+                        round(latitude, LOCATION_TILE_PRECISION),
+                        round(longitude, LOCATION_TILE_PRECISION),
+                    ),
+                    [],
+                ).append((media_path, latitude, longitude))
+
+            # Relocate the media files of each tile, keeping the tiles that
+            # exceeded the geocoding deadline to be retried at the end.
+            stragglers: list[tuple[float, float]] = []
+            for tile, queued_media_files in tiles.items():
+                try:
+                    moves.extend(
+                        self.relocate_tile(
+                            directory=directory,
+                            tile=tile,
+                            queued_media_files=queued_media_files,
+                        )
+                    )
+                except DeadlineExceeded:
+                    print(f"Deferring the location at {tile}...")
+                    stragglers.append(tile)
+                except Exception as exception:
+                    print(f"Error locating {tile}: {exception}")
+
+            # Retry the tiles that exceeded the deadline, leaving them queued
+            # for the next relocation if they exceed it again.
+            for tile in stragglers:
+                try:
+                    moves.extend(
+                        self.relocate_tile(
+                            directory=directory,
+                            tile=tile,
+                            queued_media_files=tiles[tile],
+                        )
+                    )
+                except DeadlineExceeded as exception:
+                    print(f"Skipping the location at {tile}: {exception}")
+                    self.skip_stage(stage=exception.stage, key=tile)
+                except Exception as exception:
+                    print(f"Error locating {tile}: {exception}")
+
+            # Delete the folders the media files were moved from, if left
+            # empty.
+            delete_empty_directories(
+                directory_path=directory,
+                candidate_directories=[
+                    media_path.parent for media_path, _ in moves
+                ],
+            )
+
+        # Finally, return the moved files.
+        return moves
+
+    def relocate_tile(
+        self,
+        directory: Path,
+        tile: tuple[float, float],
+        queued_media_files: list[tuple[Path, float, float]],
+    ) -> list[tuple[Path, Path]]:
+        """Move the queued media files of a coordinates tile to its location
+        directory, and remove them from the queue.
+        If there is no location at the tile, e.g. at sea, the media files are
+        left where they are. If the geolocator fails, they are left queued
+        for the next relocation.
+
+        Args:
+            directory (Path): The organized directory path.
+            tile (tuple[float, float]): The latitude and longitude of the tile.
+            queued_media_files (list[tuple[Path, float, float]]):
+                The path, latitude and longitude of each queued media file.
+
+        Raises:
+            DeadlineExceeded: If finding the location exceeded its deadline.
+            GeopyError: If the geolocator failed.
+
+        Returns:
+            list[tuple[Path, Path]]: The old and new path of each moved file.
+        """
+
+        # Find the location of the tile.
+        latitude, longitude = tile
+        city, municipality, region, country = self.run_stage(
+            stage="geocoding",
+            key=tile,
+            function=get_location_at,
+            arguments={
+                "latitude": latitude,
+                "longitude": longitude,
+                "geo_locator": self.get_geo_locator(),
+                "location_cache": self.location_cache,
+            },
+            deadline=self.configuration.geocoding_deadline,
+        )
+        location_directory: Path | None = get_location_directory(
+            base_directory=directory,
+            city=city,
+            municipality=municipality,
+            region=region,
+            country=country,
+        )
+
+        # Move the media files of the tile, if they still exist and there is
+        # a location, keeping track of the ones that no longer need to be
+        # queued.
+        moves: list[tuple[Path, Path]] = []
+        relocated_media_paths: list[Path] = []
+        if not location_directory:
+            print(
+                f"Leaving the media files at {tile}, as no location exists..."
+            )
+        for media_path, _, _ in queued_media_files:
+            if (
+                not location_directory
+                or location_directory == media_path.parent
+                or not media_path.exists()
+            ):
+                relocated_media_paths.append(media_path)
+                continue
+            print(f"Relocating {media_path}...")
+            try:
+                location_directory.mkdir(parents=True, exist_ok=True)
+                moves.append(
+                    (
+                        media_path,
+                        move_without_overwrite(
+                            media_path=media_path,
+                            new_media_path=location_directory / media_path.name,
+                            history=self.get_history(directory=directory),
+                        ),
+                    )
+                )
+                relocated_media_paths.append(media_path)
+            except Exception as exception:
+                print(f"Error relocating {media_path}: {exception}")
+
+        # Remove the relocated media files of the tile from the queue.
+        dequeue_media_files(
+            connection=self.get_connection(directory=directory),
+            media_paths=relocated_media_paths,
+        )
+
+        # Finally, return the moved files.
+        return moves
+
+    def undo(
+        self, paths: Iterable[str | Path], run_id: str
+    ) -> list[tuple[Path, Path]]:
+        """Undo the moves of a run, from the last to the first, so that
+        media files moved more than once end up where they started.
+        The undoing moves are recorded under a new run identifier too.
+        The moves that could not be undone, e.g. because their media file is
+        missing, are kept in the run, to be retried.
+
+        Args:
+            paths (Iterable[str | Path]): The organized directory paths.
+            run_id (str): The identifier of the run to undo.
+
+        Returns:
+            list[tuple[Path, Path]]: The old and new path of each moved file.
+        """
+        self.start_run()
+        try:
+            moves: list[tuple[Path, Path]] = []
+            for directory in (Path(path).absolute() for path in paths):
+                # Nothing to undo if there is no state database.
+                if not get_database_path(directory_path=directory).exists():
+                    continue
+                connection: sqlite3.Connection = self.get_connection(
+                    directory=directory
+                )
+
+                # Move each media file back, if it is still where it was moved,
+                # keeping track of the undone moves.
+                undone_sequences: list[int] = []
+                for sequence, media_path, new_media_path in load_run_moves(
+                    connection=connection, run_id=run_id
+                ):
+                    if not new_media_path.exists():
+                        print(f"Skipping {new_media_path}, as it is missing...")
+                        continue
+                    print(f"Restoring {new_media_path}...")
+                    try:
+                        media_path.parent.mkdir(parents=True, exist_ok=True)
+                        moves.append(
+                            (
+                                new_media_path,
+                                move_without_overwrite(
+                                    media_path=new_media_path,
+                                    new_media_path=media_path,
+                                    history=self.get_history(
+                                        directory=directory
+                                    ),
+                                ),
+                            )
+                        )
+                        undone_sequences.append(sequence)
+                    except Exception as exception:
+                        print(f"Error restoring {new_media_path}: {exception}")
+
+                # Forget the undone moves, keeping the others to be retried.
+                delete_run_moves(
+                    connection=connection,
+                    run_id=run_id,
+                    sequences=undone_sequences,
+                )
+
+                # Delete the folders the media files were moved from, if left
+                # empty.
+                delete_empty_directories(
+                    directory_path=directory,
+                    candidate_directories=[
+                        media_path.parent for media_path, _ in moves
+                    ],
+                )
+
+            # Finally, return the moved files.
+            return moves
+        finally:
+            self.finish_run()
+
+    def runs(self, paths: Iterable[str | Path]) -> list[tuple[str, int]]:
+        """List the recorded runs that can be undone.
+
+        Args:
+            paths (Iterable[str | Path]): The organized directory paths.
+
+        Returns:
+            list[tuple[str, int]]: The identifier and move count of each run.
+        """
+        runs: dict[str, int] = {}
+        for directory in map(Path, paths):
+            if get_database_path(directory_path=directory).exists():
+                for run_id, count in load_runs(
+                    connection=self.get_connection(directory=directory)
+                ):
+                    runs[run_id] = runs.get(run_id, 0) + count
+        return list(runs.items())
+
+    def stats(self, paths: Iterable[str | Path]) -> dict[str, int]:
+        """Count the directories and media files in the given paths, the
+        directories that changed since the previous run, and the media files
+        queued to be relocated.
+
+        Args:
+            paths (Iterable[str | Path]): The directory paths.
+
+        Returns:
+            dict[str, int]: The counts, per statistic name.
+        """
+        statistics: dict[str, int] = {
+            "directories": 0,
+            "changed_directories": 0,
+            "images": 0,
+            "videos": 0,
+            "queued_media_files": 0,
+        }
+        for directory in map(Path, paths):
+            # Count the media files queued to be relocated.
+            if get_database_path(directory_path=directory).exists():
+                statistics["queued_media_files"] += count_queued_media_files(
+                    connection=self.get_connection(directory=directory)
+                )
+
+            # Load the directory summaries of the previous run.
+            previous_summaries: dict[str, DirectorySummary] = (
+                self.load_directory_summaries(directory=directory)
+            )
+
+            for current_directory, summary, media_paths in walk_directories(
+                directory_path=directory
+            ):
+                # Count the directory and whether it changed.
+                statistics["directories"] += 1
+                if previous_summaries.get(str(current_directory)) != summary:
+                    statistics["changed_directories"] += 1
+
+                # Count the media files, per media type.
+                for media_path in media_paths:
+                    media_type: MediaType | None = get_media_type(
+                        media_path=media_path
+                    )
+                    if media_type is MediaType.IMAGE:
+                        statistics["images"] += 1
+                    elif media_type is MediaType.VIDEO:
+                        statistics["videos"] += 1
+
+        # Finally, return the statistics.
+        return statistics
+
+    def process(
+        self, paths: Iterable[str | Path], dry_run: bool
+    ) -> list[tuple[Path, Path]]:
+        """Rename and organize, or plan to, the media files in the given paths.
+
+        Args:
+            paths (Iterable[str | Path]): The directory or media file paths.
+            dry_run (bool): If True, the media files will not be moved.
+
+        Returns:
+            list[tuple[Path, Path]]: The old and new path of each moved file.
+        """
+
+        # Start with an empty name index for this call.
+        self.reserved_paths = set()
+
+        moves: list[tuple[Path, Path]] = []
+        stragglers: list[Path] = []
+        base_directory: Path | None = self.configuration.base_directory
+        for path in map(Path, paths):
+            if path.is_dir():
+                moves.extend(
+                    self.process_directory(directory=path, dry_run=dry_run)
+                )
+            elif get_media_type(media_path=path):
+                try:
+                    new_media_path: Path | None = self.process_media_file(
+                        base_directory=base_directory or path.parent,
+                        media_path=path,
+                        dry_run=dry_run,
+                    )
+                except DeadlineExceeded:
+                    stragglers.append(path)
+                    continue
+                if new_media_path and new_media_path != path:
+                    moves.append((path, new_media_path))
+            else:
+                print(f"Skipping {path}, as it is not a media file...")
+
+        # Retry the media files that exceeded a deadline.
+        for path in stragglers:
+            new_media_path = self.process_media_file(
+                base_directory=base_directory or path.parent,
+                media_path=path,
+                dry_run=dry_run,
+                retrying=True,
+            )
+            if new_media_path and new_media_path != path:
+                moves.append((path, new_media_path))
+
+        # Finally, queue the remaining media files to be relocated.
+        self.flush_geocode_queues()
+        return moves
+
+    def process_directory(
+        self, directory: Path, dry_run: bool
+    ) -> list[tuple[Path, Path]]:
+        """Rename and organize, or plan to, the media files in the directory.
+        Directories that have not changed since the previous run, with the same
+        configuration, are skipped without processing their media files.
+
+        Args:
+            directory (Path): The directory path.
+            dry_run (bool): If True, the media files will not be moved.
+
+        Returns:
+            list[tuple[Path, Path]]: The old and new path of each moved file.
+        """
+
+        # Load the directory summaries of the previous run.
+        previous_summaries: dict[str, DirectorySummary] = (
+            self.load_directory_summaries(directory=directory)
+        )
+
+        # Open the state database before walking, so that creating it does
+        # not change the directory after it is summarized.
+        if not dry_run:
+            self.get_connection(directory=directory)
+
+        # Create a dictionary to track the summaries of this run, reusing the
+        # ones of the unchanged directories.
+        summaries: dict[str, DirectorySummary] = {}
+
+        # Create a set to track the directories whose entries may change by
+        # processing them, to summarize them again afterwards.
+        changed_directories: set[Path] = set()
+
+        # Create a set to track processed files.
+        processed_files: set = set()
+
+        # Create a set to track directories with files that failed processing,
+        # so they will not be skipped on the next run.
+        failed_directories: set = set()
+
+        # Create a list to track the media files that exceeded a deadline,
+        # to be retried once all the others are processed.
+        stragglers: list[tuple[Path, Path]] = []
+
+        # Iterate through all directories and their media files.
+        moves: list[tuple[Path, Path]] = []
+        for current_directory, summary, media_paths in walk_directories(
+            directory_path=directory
+        ):
+            # Skip the directory if it has not changed since the previous run.
+            summaries[str(current_directory)] = summary
+            if previous_summaries.get(str(current_directory)) == summary:
+                continue
+            changed_directories.add(current_directory)
+
+            for media_path in media_paths:
+                # Skip the file if it is not a media file.
+                if not get_media_type(media_path=media_path):
+                    continue
+
+                # Check if this file has already been processed.
+                if media_path.resolve() in processed_files:
+                    continue
+
+                # Rename the media file, or retry it later if it is too slow.
+                try:
+                    new_media_path: Path | None = self.process_media_file(
+                        base_directory=directory,
+                        media_path=media_path,
+                        dry_run=dry_run,
+                    )
+                except DeadlineExceeded:
+                    stragglers.append((current_directory, media_path))
+                    continue
+
+                # Keep track of the directory if the processing failed.
+                if new_media_path is None:
+                    failed_directories.add(current_directory)
+                    continue
+
+                # Add this path to the set of processed files.
+                processed_files.add(new_media_path.resolve())
+                if new_media_path != media_path:
+                    moves.append((media_path, new_media_path))
+
+        # Retry the media files that exceeded a deadline.
+        for current_directory, media_path in stragglers:
+            new_media_path = self.process_media_file(
+                base_directory=directory,
+                media_path=media_path,
+                dry_run=dry_run,
+                retrying=True,
+            )
+            if new_media_path is None:
+                failed_directories.add(current_directory)
+            elif new_media_path != media_path:
+                moves.append((media_path, new_media_path))
+
+        # Nothing else to do, if the media files were not moved.
+        if dry_run:
+            return moves
+
+        # Keep track of the directories the media files were moved to, along
+        # with their parents, as they may have been created.
+        for media_path, new_media_path in moves:
+            destination_directory: Path = new_media_path.parent
+            while (
+                destination_directory != media_path.parent
+                and destination_directory not in changed_directories
+                and destination_directory.is_relative_to(directory)
+            ):
+                changed_directories.add(destination_directory)
+                destination_directory = destination_directory.parent
+
+        # Delete the processed folders left empty, recursively, which changes
+        # their parents too.
+        deleted_directories: set[Path] = delete_empty_directories(
+            directory_path=directory,
+            candidate_directories=changed_directories,
+        )
+        changed_directories |= {
+            deleted_directory.parent
+            for deleted_directory in deleted_directories
+        }
+        changed_directories -= deleted_directories
+        for deleted_directory in deleted_directories:
+            summaries.pop(str(deleted_directory), None)
+
+        # Summarize the changed directories again.
+        for changed_directory in changed_directories:
+            try:
+                summaries[str(changed_directory)] = summarize_directory(
+                    directory_path=changed_directory
+                )
+            except OSError:
+                summaries.pop(str(changed_directory), None)
+
+        # Queue the remaining media files to be relocated, before storing
+        # the summaries, so that they are processed again if interrupted.
+        self.flush_geocode_queues()
+
+        # Store the directory summaries after this run, except for the ones
+        # with failed files.
+        self.save_directory_summaries(
+            directory=directory,
+            summaries={
+                current_directory: summary
+                for current_directory, summary in summaries.items()
+                if Path(current_directory) not in failed_directories
+            },
+        )
+
+        # Finally, return the moved files.
+        return moves
+
+    def process_media_file(
+        self,
+        base_directory: Path,
+        media_path: Path,
+        dry_run: bool,
+        retrying: bool = False,
+    ) -> Path | None:
+        """Rename and organize, or plan to, the media file.
+
+        Args:
+            base_directory (Path):
+                The base directory where the media files are stored.
+            media_path (Path): The path to the media file.
+            dry_run (bool): If True, the media file will not be moved.
+            retrying (bool, optional):
+                If True, the media file already exceeded a deadline, and
+                it is skipped if it exceeds it again. Defaults to False.
+
+        Raises:
+            DeadlineExceeded:
+                If not retrying and reading the metadata or geocoding
+                exceeded its deadline.
+
+        Returns:
+            Path | None: The new media file path, if processed successfully.
+        """
+
+        # Print the media file we are processing.
+        print(f"{'Retrying' if retrying else 'Processing'} {media_path}...")
+
+        try:
+            # Get the path the media file should have, and the coordinates to
+            # relocate it later, if location searching is deferred.
+            new_media_path, coordinates = self.get_new_media_path(
+                base_directory=base_directory, media_path=media_path
+            )
+
+            # Keep the media file where it is, if it is already there, e.g.
+            # as a copy named on a previous run.
+            if is_available_path_of(
+                media_path=media_path, new_media_path=new_media_path
+            ):
+                new_media_path = media_path
+
+            # Only reserve the path, if the media file should not be moved.
+            if dry_run:
+                if new_media_path != media_path:
+                    new_media_path = get_available_path(
+                        new_media_path=new_media_path,
+                        reserved_paths=self.reserved_paths,
+                    )
+                    self.reserved_paths.add(new_media_path)
+                return new_media_path
+
+            # Move the media file only if it is not already there.
+            if new_media_path != media_path:
+                # Create the destination if it does not exist, including any
+                # necessary parent directories.
+                new_media_path.parent.mkdir(parents=True, exist_ok=True)
+
+                # Move the media file to its new path.
+                new_media_path = move_without_overwrite(
+                    media_path=media_path,
+                    new_media_path=new_media_path,
+                    history=self.get_history(directory=base_directory),
+                )
+
+            # Queue the media file to be relocated, if needed.
+            if coordinates:
+                latitude, longitude = coordinates
+                self.get_geocode_queue(directory=base_directory).enqueue(
+                    media_path=new_media_path,
+                    latitude=latitude,
+                    longitude=longitude,
+                )
+
+            # Finally, return the new media path.
+            return new_media_path
+        except DeadlineExceeded as exception:
+            if not retrying:
+                print(f"Deferring {media_path}: {exception}")
+                raise
+            print(f"Skipping {media_path}: {exception}")
+            self.skip_stage(stage=exception.stage, key=media_path)
+            return None
+        except Exception as exception:
+            print(f"Error processing {media_path}: {exception}")
+            return None
+
+    def get_new_media_path(
+        self, base_directory: Path, media_path: Path
+    ) -> tuple[Path, tuple[float, float] | None]:
+        """Get the path the media file should have, according to its metadata.
+        If location searching is deferred, the media file is kept in its
+        directory, and the coordinates to relocate it later are returned.
+
+        Args:
+            base_directory (Path):
+                The base directory where the media files are stored.
+            media_path (Path): The path to the media file.
+
+        Returns:
+            tuple[Path, tuple[float, float] | None]:
+                The new media file path, which may already be taken, and
+                the coordinates to relocate it later, if available.
+        """
+
+        # Extract the datetime taken from the filename, if it may be used,
+        # recognizing the media files already named, e.g. on a previous run.
+        media_type: MediaType = get_media_type(media_path=media_path)
+        named_datetime: datetime | None = None
+        filename_datetime: datetime | None = None
+        if (
+            self.configuration.filename_datetime_policy
+            is not FilenameDatetimePolicy.NEVER
+        ):
+            named_datetime = extract_named_datetime(
+                media_path=media_path,
+                naming_datetime_format=(
+                    self.configuration.naming_datetime_format
+                ),
+            )
+            filename_datetime = named_datetime or extract_filename_datetime(
+                media_path=media_path,
+                patterns=self.configuration.filename_datetime_patterns,
+            )
+
+        # Get the metadata, unless only the preferred filename datetime
+        # is needed.
+        metadata: dict | None = (
+            self.run_stage(
+                stage="metadata",
+                key=media_path,
+                function=read_metadata,
+                arguments={"media_path": media_path, "media_type": media_type},
+                deadline=self.configuration.metadata_deadline,
+            )
+            if not filename_datetime
+            or self.configuration.filename_datetime_policy
+            is not FilenameDatetimePolicy.PREFER
+            or self.configuration.location_searching
+            or self.configuration.time_zone_searching
+            else None
+        )
+
+        # Extract the formatted datetime the picture was taken.
+        formatted_datetime: str = get_datetime_taken(
+            metadata=metadata,
+            media_type=media_type,
+            media_path=media_path,
+            naming_datetime_format=self.configuration.naming_datetime_format,
+            time_zone=self.configuration.time_zone,
+            time_zone_searching=self.configuration.time_zone_searching,
+            filename_datetime=filename_datetime,
+            filename_datetime_policy=(
+                self.configuration.filename_datetime_policy
+            ),
+            named_datetime=named_datetime,
+        )
+
+        # Determine the new media file name and destination directory.
+        new_media_file_name: str = (
+            f"{formatted_datetime}{media_path.suffix.lower()}"
+        )
+        destination_directory: Path = media_path.parent
+
+        # Only keep the coordinates, if location searching is deferred.
+        if (
+            self.configuration.location_searching
+            and self.configuration.deferred_location_searching
+        ):
+            latitude, longitude = (
+                extract_metadata_latitude_longitude(metadata=metadata)
+                if media_type is MediaType.IMAGE and metadata
+                else (None, None)
+            )
+            return (
+                destination_directory / new_media_file_name,
+                (
+                    (latitude, longitude)
+                    if latitude is not None and longitude is not None
+                    else None
+                ),
+            )
+
+        # Check if location searching is enabled.
+        if self.configuration.location_searching:
+            # Extract the formatted location the picture was taken.
+            city, municipality, region, country = self.run_stage(
+                stage="geocoding",
+                key=media_path,
+                function=get_location_taken,
+                arguments={
+                    "metadata": metadata,
+                    "media_type": media_type,
+                    "geo_locator": self.get_geo_locator(),
+                    "location_cache": self.location_cache,
+                },
+                deadline=self.configuration.geocoding_deadline,
+            )
+
+            # Move the media file to the location directory, if available.
+            destination_directory = (
+                get_location_directory(
+                    base_directory=base_directory,
+                    city=city,
+                    municipality=municipality,
+                    region=region,
+                    country=country,
+                )
+                or destination_directory
+            )
+
+        # Finally, return the new media path.
+        return destination_directory / new_media_file_name, None
+
+    def load_directory_summaries(
+        self, directory: Path
+    ) -> dict[str, DirectorySummary]:
+        """Load the directory summaries of the previous run, from memory if
+        this organizer ran before, otherwise from the state database.
+
+        Args:
+            directory (Path): The organized directory path.
+
+        Returns:
+            dict[str, DirectorySummary]: The summaries, per directory path.
+        """
+
+        # Return the summaries kept in memory, if available.
+        if directory in self.directory_summaries:
+            return self.directory_summaries[directory]
+
+        # Do not create the state database only for reading it.
+        if not get_database_path(directory_path=directory).exists():
+            return {}
+
+        # Load the summaries from the state database.
+        summaries: dict[str, DirectorySummary] = load_directory_summaries(
+            connection=self.get_connection(directory=directory),
+            configuration=self.configuration.serialize(),
+        )
+        self.directory_summaries[directory] = summaries
+        return summaries
+
+    def save_directory_summaries(
+        self, directory: Path, summaries: dict[str, DirectorySummary]
+    ) -> None:
+        """Store the directory summaries of this run, in memory and in the
+        state database.
+
+        Args:
+            directory (Path): The organized directory path.
+            summaries (dict[str, DirectorySummary]):
+                The summaries, per directory path.
+        """
+        save_directory_summaries(
+            connection=self.get_connection(directory=directory),
+            configuration=self.configuration.serialize(),
+            summaries=summaries,
+        )
+        self.directory_summaries[directory] = summaries
+
+    def run_stage(
+        self,
+        stage: str,
+        key: Hashable,
+        function: Callable[..., Any],
+        arguments: dict,
+        deadline: float | None,
+    ) -> Any:
+        """Run a stage up to its deadline, or wait again for the same stage
+        if it exceeded its deadline before and is still running.
+
+        Args:
+            stage (str): The stage name, e.g. metadata or geocoding.
+            key (Hashable): The key of the stage, e.g. the media file path.
+            function (Callable[..., Any]): The function to run.
+            arguments (dict): The keyword arguments of the function.
+            deadline (float | None):
+                The seconds to wait for, or None to wait without limit.
+
+        Raises:
+            DeadlineExceeded: If the stage did not finish before the deadline.
+
+        Returns:
+            Any: The result of the function.
+        """
+        try:
+            return run_with_deadline(
+                workers=self.get_stage_workers(stage=stage),
+                function=function,
+                arguments=arguments,
+                deadline=deadline,
+                future=self.pending_stages.pop((stage, key), None),
+            )
+        except DeadlineExceeded as exception:
+            self.pending_stages[(stage, key)] = exception.future
+            raise
+
+    def skip_stage(self, stage: str, key: Hashable) -> None:
+        """Stop waiting for a stage that exceeded its deadline again,
+        cancelling it if it has not started running yet.
+
+        Args:
+            stage (str): The stage name, e.g. metadata or geocoding.
+            key (Hashable): The key of the stage, e.g. the media file path.
+        """
+        future: Future | None = self.pending_stages.pop((stage, key), None)
+        if future is not None:
+            future.cancel()
+
+    def get_stage_workers(self, stage: str) -> StageWorkers:
+        """Get the threads running the stage, creating them on first use.
+
+        Args:
+            stage (str): The stage name, e.g. metadata or geocoding.
+
+        Returns:
+            StageWorkers: The stage threads.
+        """
+        if stage not in self.stage_workers:
+            self.stage_workers[stage] = StageWorkers(
+                stage=stage, count=STAGE_THREAD_COUNTS[stage]
+            )
+        return self.stage_workers[stage]
+
+    def start_run(self) -> str:
+        """Start a new run, to record its moves under a new identifier.
+
+        Returns:
+            str: The run identifier.
+        """
+        self.run_id = create_run_id()
+        self.histories = {}
+        return self.run_id
+
+    def finish_run(self) -> None:
+        """Finish the current run, whose moves are already recorded."""
+        self.histories = None
+
+    def get_history(self, directory: Path) -> MoveHistory | None:
+        """Get the move history of the current run, in the state database of
+        the organized directory.
+
+        Args:
+            directory (Path): The organized directory path.
+
+        Returns:
+            MoveHistory | None: The move history, if a run is in progress.
+        """
+        if self.histories is None:
+            return None
+        if directory not in self.histories:
+            self.histories[directory] = MoveHistory(
+                connection=self.get_connection(directory=directory),
+                run_id=self.run_id,
+            )
+        return self.histories[directory]
+
+    def get_geocode_queue(self, directory: Path) -> GeocodeQueue:
+        """Get the queue of the media files to be relocated, in the state
+        database of the organized directory.
+
+        Args:
+            directory (Path): The organized directory path.
+
+        Returns:
+            GeocodeQueue: The geocode queue.
+        """
+        if directory not in self.geocode_queues:
+            self.geocode_queues[directory] = GeocodeQueue(
+                connection=self.get_connection(directory=directory)
+            )
+        return self.geocode_queues[directory]
+
+    def flush_geocode_queues(self) -> None:
+        """Store the media files not yet queued to be relocated."""
+        for geocode_queue in self.geocode_queues.values():
+            geocode_queue.flush()
+
+    def get_geo_locator(self) -> Nominatim:
+        """Get the geolocator, creating it on first use, so that commands
+        not searching for locations never import geopy.
+
+        Returns:
+            Nominatim: The geolocator.
+        """
+        if self.geo_locator is None:
+            self.geo_locator = create_geo_locator()
+        return self.geo_locator
+
+    def get_connection(self, directory: Path) -> sqlite3.Connection:
+        """Get the state database connection of the organized directory,
+        connecting to it on first use.
+
+        Args:
+            directory (Path): The organized directory path.
+
+        Returns:
+            sqlite3.Connection: The database connection.
+        """
+        if directory not in self.connections:
+            self.connections[directory] = connect_database(
+                directory_path=directory
+            )
+        return self.connections[directory]